@@ -1,5 +1,12 @@
 from django_components import Component, register
 
+from components.variants import VariantClasses
+
+ACCORDION_CLASSES = VariantClasses(
+    "usa-accordion",
+    bordered={False: "", True: "usa-accordion--bordered"},
+)
+
 
 @register("accordion")
 class Accordion(Component):
@@ -56,9 +63,8 @@ class Accordion(Component):
         **kwargs,
     ):
         return {
+            "root_class": ACCORDION_CLASSES.get(kwargs.get("class"), bordered=bool(bordered)),
             "items": items,
-            "bordered": bordered,
             "multiselectable": multiselectable,
             "id_prefix": id_prefix,
-            "extra_class": kwargs.get("class"),
         }
@@ -1,5 +1,19 @@
 from django_components import Component, register
 
+from components.variants import VariantClasses
+
+ALERT_CLASSES = VariantClasses(
+    "usa-alert",
+    type={
+        "success": "usa-alert--success",
+        "warning": "usa-alert--warning",
+        "error": "usa-alert--error",
+        "info": "usa-alert--info",
+        "emergency": "usa-alert--emergency",
+    },
+    slim={False: "", True: "usa-alert--slim"},
+)
+
 
 @register("alert")
 class Alert(Component):
@@ -9,7 +23,8 @@ class Alert(Component):
     Displays important messages to users with contextual styling based on type.
 
     Parameters:
-        type (str): Alert type - "success", "warning", "error", or "info" (default: "info")
+        type (str): Alert type - "success", "warning", "error", "info", or "emergency"
+                    (default: "info")
         heading (str): Optional heading text for the alert
         message (str): The alert message content
         slim (bool): If True, displays a compact version without icon (default: False)
@@ -38,6 +53,7 @@ class Alert(Component):
     """
 
     template_name = "alert/alert.html"
+    pure = True
 
     def get_context_data(
         self,
@@ -48,9 +64,7 @@ class Alert(Component):
         **kwargs,
     ):
         return {
-            "type": type,
+            "root_class": ALERT_CLASSES.get(kwargs.get("class"), type=type, slim=bool(slim)),
             "heading": heading,
             "message": message,
-            "slim": slim,
-            "extra_class": kwargs.get("class"),
         }
@@ -19,9 +19,11 @@ class Banner(Component):
         The banner content is typically provided in the template between the opening
         and closing tags. In most cases, you can use the default text as shown above.
         This component is usually included once in the base layout template.
+        Because it is pure, the call in the layout is rendered once when the layout is compiled.
     """
 
     template_name = "banner/banner.html"
+    pure = True
 
     def get_context_data(self, **kwargs):
         return {
@@ -1,5 +1,34 @@
 from django_components import Component, register
 
+from components.variants import VariantClasses
+
+BUTTON_CLASSES = VariantClasses(
+    "usa-button",
+    color={
+        None: "",
+        "secondary": "usa-button--secondary",
+        "accent-cool": "usa-button--accent-cool",
+        "accent-warm": "usa-button--accent-warm",
+        "base": "usa-button--base",
+    },
+    outline={False: "", True: "usa-button--outline"},
+    inverse={False: "", True: "usa-button--inverse"},
+    unstyled={False: "", True: "usa-button--unstyled"},
+    size={None: "", "big": "usa-button--big"},
+)
+
+# Shorthand `type` values and the variants they stand for
+BUTTON_TYPES = {
+    "default": {},
+    "primary": {},
+    "secondary": {"color": "secondary"},
+    "accent-cool": {"color": "accent-cool"},
+    "accent-warm": {"color": "accent-warm"},
+    "base": {"color": "base"},
+    "outline": {"outline": True},
+    "outline inverse": {"outline": True, "inverse": True},
+}
+
 
 @register("button")
 class Button(Component):
@@ -10,8 +39,13 @@ class Button(Component):
 
     Parameters:
         text (str): Button text content (required)
-        type (str): Button style - "default", "primary", "secondary", "accent-cool",
-                    "base", "outline", or "outline inverse" (default: "default")
+        type (str): Button style shorthand - "default", "primary", "secondary", "accent-cool",
+                    "accent-warm", "base", "outline", or "outline inverse" (default: "default")
+        color (str): Button color - "secondary", "accent-cool", "accent-warm", "base",
+                     or None for primary (default: None, or the color implied by `type`)
+        outline (bool): If True, renders an outline button (default: False)
+        inverse (bool): If True, renders for use on dark backgrounds (default: False)
+        unstyled (bool): If True, renders a button that looks like a link (default: False)
         size (str): Button size - "big" or None for normal (default: None)
         url (str): Optional URL to make the button a link (default: None)
         submit (bool): If True, renders as submit button (default: False)
@@ -35,6 +69,12 @@ class Button(Component):
           url="/about"
         %}{% endcomponent %}
 
+        {% component "button"
+          text="Outline Accent Button"
+          color="accent-cool"
+          outline=True
+        %}{% endcomponent %}
+
         {% component "button"
           text="Big Primary Button"
           type="primary"
@@ -44,25 +84,36 @@ class Button(Component):
     """
 
     template_name = "button/button.html"
+    pure = True
 
     def get_context_data(
         self,
         text,
         type="default",
-        color=None,  # TODO: implement in template, update docs
-        outline=False,  # TODO: implmeent in template, update docs
-        inversse=False,  # TODO: implmeent in template, update docs
+        color=None,
+        outline=False,
+        inverse=False,
         unstyled=False,
         size=None,
         url=None,
         submit=False,
         **kwargs,
     ):
+        if type not in BUTTON_TYPES:
+            allowed = ", ".join(repr(option) for option in BUTTON_TYPES)
+            raise ValueError(f"Invalid type {type!r} for usa-button, expected one of: {allowed}")
+        variants = BUTTON_TYPES[type]
+
         return {
+            "root_class": BUTTON_CLASSES.get(
+                kwargs.get("class"),
+                color=color or variants.get("color"),
+                outline=bool(outline or variants.get("outline")),
+                inverse=bool(inverse or variants.get("inverse")),
+                unstyled=bool(unstyled),
+                size=size,
+            ),
             "text": text,
-            "type": type,
-            "size": size,
             "url": url,
             "submit": submit,
-            "extra_class": kwargs.get("class"),
         }
@@ -1,5 +1,21 @@
 from django_components import Component, register
 
+from components.images import responsive_image, static_url
+from components.variants import VariantClasses
+
+CARD_CLASSES = VariantClasses(
+    "usa-card",
+    flag={False: "", True: "usa-card--flag"},
+    header_first={False: "", True: "usa-card--header-first"},
+    media_right={False: "", True: "usa-card--media-right"},
+)
+
+CARD_MEDIA_CLASSES = VariantClasses(
+    "usa-card__media",
+    inset={False: "", True: "usa-card__media--inset"},
+    exdent={False: "", True: "usa-card__media--exdent"},
+)
+
 
 @register("card")
 class Card(Component):
@@ -11,8 +27,14 @@ class Card(Component):
     Parameters:
         title (str): Card heading (required)
         description (str): Card body text content (required)
-        media_url (str): Optional image URL for card media
+        media_url (str): Optional image for card media, either a URL or the static path of an
+            image built by `manage.py build_images` (e.g. "img/hero.jpg"), which is served as
+            AVIF/WebP/JPEG variants sized for the card
         media_alt (str): Alt text for image (defaults to title if not provided)
+        media_sizes (str): `sizes` attribute of built images, the rendered width of the media
+            (default: the width of a card in a responsive 1/2/3 column grid)
+        media_lazy (bool): If True, the image loads when scrolled near the viewport, set to
+            False for cards above the fold (default: True)
         link_url (str): Optional URL for card footer link
         link_text (str): Link text (default: "Visit")
         flag (bool): If True, displays horizontal layout (default: False)
@@ -46,7 +68,7 @@ class Card(Component):
         {% component "card"
           title="Card with Media"
           description="This card includes an image"
-          media_url="/static/img/example.jpg"
+          media_url="img/example.jpg"
           media_alt="Example image"
           grid_col="tablet:grid-col-6 tablet-lg:grid-col-4"
         %}{% endcomponent %}
@@ -55,7 +77,8 @@ class Card(Component):
           title="Flag Layout Card"
           description="Horizontal layout with media on left"
           flag=True
-          media_url="/static/img/example.jpg"
+          media_url="img/example.jpg"
+          media_sizes="(min-width: 640px) 15rem, 100vw"
           link_url="#"
           link_text="Visit"
           grid_col="flex-1"
@@ -72,6 +95,10 @@ class Card(Component):
 
     """
 
+    # Rendered width of the media in a `usa-card-group` of `grid_col="tablet:grid-col-6
+    # tablet-lg:grid-col-4"` cards: 1 column on mobile, 2 on tablet and 3 on larger screens
+    DEFAULT_MEDIA_SIZES = "(min-width: 880px) 33vw, (min-width: 640px) 50vw, 100vw"
+
     template_name = "card/card.html"
     tag = ""  # No wrapper element - card template already has <li> tag
 
@@ -81,6 +108,8 @@ class Card(Component):
         description,
         media_url=None,
         media_alt=None,
+        media_sizes=DEFAULT_MEDIA_SIZES,
+        media_lazy=True,
         link_url=None,
         link_text="Visit",
         flag=False,
@@ -91,18 +120,30 @@ class Card(Component):
         grid_col=None,
         **kwargs,
     ):
+        image = responsive_image(media_url)
+        if not image and media_url and not media_url.startswith(("/", "http:", "https:")):
+            # A static image that has no variants (yet) is served as is, other URLs unchanged
+            media_url = static_url(media_url) or media_url
+
         return {
+            "root_class": CARD_CLASSES.get(
+                grid_col,
+                kwargs.get("class"),
+                flag=bool(flag),
+                header_first=bool(header_first),
+                media_right=bool(media_right),
+            ),
+            "media_class": CARD_MEDIA_CLASSES.get(
+                inset=bool(media_inset), exdent=bool(media_exdent)
+            ),
             "title": title,
             "description": description,
             "media_url": media_url,
             "media_alt": media_alt or title,
+            "media_sizes": media_sizes,
+            "media_loading": "lazy" if media_lazy else "eager",
+            "image": image,
             "link_url": link_url,
             "link_text": link_text,
-            "flag": flag,
             "header_first": header_first,
-            "media_right": media_right,
-            "media_inset": media_inset,
-            "media_exdent": media_exdent,
-            "grid_col": grid_col,
-            "extra_class": kwargs.get("class"),
         }
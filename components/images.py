@@ -0,0 +1,104 @@
+import functools
+import json
+import os
+from typing import Any
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+
+# Widths generated for each source image, a source is never scaled up
+IMAGE_WIDTHS: tuple[int, ...] = (320, 640, 960, 1280, 1920)
+
+# Formats in order of preference: (extension, MIME type, Pillow save options)
+IMAGE_FORMATS: dict[str, tuple[str, str, dict[str, Any]]] = {
+    "avif": ("avif", "image/avif", {"quality": 50}),
+    "webp": ("webp", "image/webp", {"quality": 75, "method": 6}),
+    "jpeg": ("jpg", "image/jpeg", {"quality": 80, "optimize": True, "progressive": True}),
+    # Used instead of JPEG for images with transparency
+    "png": ("png", "image/png", {"optimize": True}),
+}
+
+# Static files that derived images are built for, relative to the static directory
+IMAGE_SOURCES: tuple[str, ...] = ("img/**/*.jpg", "img/**/*.jpeg", "img/**/*.png")
+
+MANIFEST_NAME = "images.json"
+
+
+def manifest_path() -> str:
+    return os.path.join(settings.DERIVED_IMAGES_ROOT, MANIFEST_NAME)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_manifest(path: str, mtime: float) -> dict[str, dict]:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def load_manifest() -> dict[str, dict]:
+    """Return the derived image manifest written by `manage.py build_images`"""
+    path = manifest_path()
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return {}
+    # Reloaded whenever `build_images` rewrites it, no restart needed
+    return _load_manifest(path, mtime)
+
+
+@functools.lru_cache(maxsize=1024)
+def find_static_file(path: str) -> bool:
+    """Return whether the static files finders find `path`, cached per path"""
+    return finders.find(path) is not None
+
+
+def static_url(path: str) -> str | None:
+    """
+    Return the URL of a static file, or None if `path` isn't one (a relative media path, a
+    `data:` URI...), which `static()` would turn into a broken URL or, with the manifest of
+    `ManifestStaticFilesStorage`, an error
+    """
+    manifest = getattr(staticfiles_storage, "hashed_files", {})
+    if path in manifest:
+        return static(path)
+    # The finders stat files in every static directory, so the result is cached, except in DEBUG
+    # where static files are added while the server runs
+    found = finders.find(path) is not None if settings.DEBUG else find_static_file(path)
+    return static(path) if found else None
+
+
+def responsive_image(path: str | None) -> dict[str, Any] | None:
+    """
+    Look up the derived variants of a static image.
+
+    Returns None for images that have no variants (e.g. external URLs), otherwise:
+
+        {
+            "src": "/assets/derived/img/hero.1a2b3c4d.1920.jpg",
+            "srcset": "/assets/derived/img/hero.1a2b3c4d.320.jpg 320w, ...",
+            "sources": [{"type": "image/avif", "srcset": "..."}, ...],
+            "width": 2048,
+            "height": 820,
+        }
+    """
+    image = load_manifest().get(path) if path else None
+    if not image:
+        return None
+
+    srcsets = {
+        name: ", ".join(f"{static(variant)} {width}w" for width, variant in variants)
+        for name, variants in image["variants"].items()
+    }
+    fallback = "png" if image["alpha"] else "jpeg"
+    return {
+        "src": static(image["variants"][fallback][-1][1]),
+        "srcset": srcsets[fallback],
+        "sources": [
+            {"type": IMAGE_FORMATS[name][1], "srcset": srcsets[name]}
+            for name in ("avif", "webp")
+            if name in srcsets
+        ],
+        "width": image["width"],
+        "height": image["height"],
+    }
@@ -0,0 +1,74 @@
+import itertools
+from typing import Any
+
+
+class VariantClasses:
+    """
+    Precomputed CSS class strings for every combination of a component's variants
+
+    Each keyword argument is a variant axis mapping its allowed values to the modifier class
+    it adds ("" adds nothing). The class string for every combination is built once, when the
+    component module is imported, so rendering is a single dictionary lookup.
+
+    Parameters:
+        base (str): Class always present on the element, e.g. "usa-alert"
+        **axes (dict): Allowed values and modifier classes for each variant
+
+    Usage:
+
+        ALERT_CLASSES = VariantClasses(
+            "usa-alert",
+            type={"info": "usa-alert--info", "error": "usa-alert--error"},
+            slim={False: "", True: "usa-alert--slim"},
+        )
+
+        ALERT_CLASSES.get(type="error", slim=True)
+        # "usa-alert usa-alert--error usa-alert--slim"
+
+        ALERT_CLASSES.get(type="danger", slim=False)
+        # ValueError: Invalid type 'danger' for usa-alert, expected one of: 'info', 'error'
+    """
+
+    def __init__(self, base: str, **axes: dict[Any, str]):
+        self.base = base
+        self.axes = axes
+        self.table: dict[tuple, str] = {
+            combination: " ".join(
+                [
+                    base,
+                    *filter(
+                        None,
+                        (axes[name][value] for name, value in zip(axes, combination, strict=True)),
+                    ),
+                ]
+            )
+            for combination in itertools.product(*axes.values())
+        }
+
+    def get(self, *extra: str | None, **variants: Any) -> str:
+        """Look up the class string for the given variants, appending any extra classes"""
+        try:
+            if len(variants) != len(self.axes):
+                raise KeyError
+            classes = self.table[tuple(variants[name] for name in self.axes)]
+        except (KeyError, TypeError):
+            raise ValueError(self._describe_error(variants)) from None
+
+        extra_classes = " ".join(item for item in extra if item)
+        return f"{classes} {extra_classes}" if extra_classes else classes
+
+    def _describe_error(self, variants: dict[str, Any]) -> str:
+        missing = [name for name in self.axes if name not in variants]
+        if missing:
+            return f"Missing variants for {self.base}: {', '.join(missing)}"
+
+        unknown = [name for name in variants if name not in self.axes]
+        if unknown:
+            return f"Unknown variants for {self.base}: {', '.join(unknown)}"
+
+        for name, value in variants.items():
+            if value not in self.axes[name]:
+                allowed = ", ".join(repr(option) for option in self.axes[name])
+                return f"Invalid {name} {value!r} for {self.base}, expected one of: {allowed}"
+
+        return f"Invalid variants for {self.base}: {variants}"
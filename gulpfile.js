@@ -4,6 +4,8 @@
  * Import uswds-compile
  */
 import uswds from "@uswds/compile";
+import { spawn } from "node:child_process";
+import { series, watch as watchFiles } from "gulp";
 
 /**
  * USWDS version
@@ -79,6 +81,19 @@ uswds.settings.compile.sassSourcemaps = true;
 // Sass will output even when this value is set to false.
 uswds.settings.compile.sassDeprecationWarnings = true;
 
+/**
+ * Font subsetting
+ * Subsets the fonts of the compiled CSS to the glyphs the site uses (WOFF2 only)
+ * and points its @font-face rules at them. See scripts/subset_fonts.py
+ * Runs the Python interpreter in $PYTHON (the virtual environment's with `just build`),
+ * or `python3` from the PATH.
+ */
+const python = process.env.PYTHON || "python3";
+
+function subsetFonts() {
+  return spawn(python, ["scripts/subset_fonts.py"], { stdio: "inherit" });
+}
+
 /**
  * Exports
  * Add as many as you need
@@ -99,12 +114,20 @@ export const init = uswds.init;
 // Build the USWDS icon sprite into                          `paths.dist.img`
 
 // Run `npx gulp compile`
-export const compile = uswds.compile;
+export const compile = series(uswds.compile, subsetFonts);
 // Compile Sass into                                         `paths.dist.css`,
 // Then build the USWDS icon sprite into                     `paths.dist.img`
+// Then subset the fonts of the CSS into                     `public/webfonts`
 
 // Run `npx gulp watch`
-export const watch = uswds.watch;
+const compileSass = series(uswds.compileSass, subsetFonts);
+
+export const watch = series(compileSass, function watchSass() {
+  watchFiles(
+    [`${uswds.paths.dist.theme}/**/*.scss`, `${uswds.paths.src.projectSass}/**/*.scss`],
+    compileSass,
+  );
+});
 // Compiles, then recompiles when there are changes to Sass files in
 //                                                           `paths.dist.theme`
 //                                                           `paths.src.projectSass`
@@ -0,0 +1,137 @@
+"""
+Compare admin changelists of a large table with `ModelAdmin` and `core.admin.LargeTableAdmin`.
+
+A SQLite database in a temporary directory stands in for SQL Server, with `--rows` generated
+users and `ANALYZE` statistics for the estimated count. Both admins list the users, and each
+page is requested the way a user reaches it: the first page, the next page through its link
+(carrying the keyset cursor with `LargeTableAdmin`), and pages deep into the table.
+
+    python scripts/bench_admin_changelist.py --rows 1000000
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_DIR: Path = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(PROJECT_DIR / "server"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret-key")
+# Force the SQLite fallback, and keep sessions out of Redis
+os.environ["DB_HOST"] = ""
+os.environ["METRICS_ENABLED"] = "false"
+os.environ["ADMISSION_CONTROL"] = "false"
+os.environ["SQL_INSTRUMENTATION_SAMPLE_RATE"] = "0"
+
+from django.conf import settings  # noqa: E402
+
+DATABASE_DIR = tempfile.TemporaryDirectory()
+settings.DATABASES["default"]["NAME"] = Path(DATABASE_DIR.name) / "bench.sqlite3"
+settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+settings.ROOT_URLCONF = __name__
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib import admin  # noqa: E402
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.urls import path  # noqa: E402
+
+from core.admin import LargeTableAdmin  # noqa: E402
+
+LIST_DISPLAY = ("username", "email", "is_staff", "date_joined")
+
+# The cursor of the next page link, e.g. `?_after=999901&amp;p=2`
+NEXT_LINK_REGEX = re.compile(r'href="(\?(?:_after=\d+&amp;)?p=2)"')
+
+
+class DefaultUserAdmin(admin.ModelAdmin):
+    list_display = LIST_DISPLAY
+
+
+class LargeUserAdmin(LargeTableAdmin):
+    list_display = LIST_DISPLAY
+
+
+default_site = admin.AdminSite(name="default_admin")
+default_site.register(User, DefaultUserAdmin)
+large_site = admin.AdminSite(name="large_admin")
+large_site.register(User, LargeUserAdmin)
+
+urlpatterns = [
+    path("default/", default_site.urls),
+    path("large/", large_site.urls),
+]
+
+
+def generate_users(rows: int, batch_size: int = 50_000) -> None:
+    password = make_password(None)
+    sql = (
+        "INSERT INTO auth_user (username, email, password, first_name, last_name, is_superuser,"
+        " is_staff, is_active, date_joined) VALUES (%s, %s, %s, '', '', 0, 0, 1, %s)"
+    )
+    with transaction.atomic():
+        for start in range(0, rows, batch_size):
+            connection.cursor().executemany(
+                sql,
+                [
+                    (f"user{i}", f"user{i}@example.com", password, "2025-01-01 00:00:00")
+                    for i in range(start, min(start + batch_size, rows))
+                ],
+            )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def bench(client: Client, url: str, iterations: int) -> tuple[float, float, int]:
+    """Return the mean request and SQL times in milliseconds and the queries per request"""
+    client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+        elapsed = time.perf_counter() - start
+    sql_time = sum(float(query["time"]) for query in queries.captured_queries)
+    return elapsed / iterations * 1000, sql_time / iterations * 1000, len(queries) // iterations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark admin changelists on a large table")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Users in the table")
+    parser.add_argument("--iterations", type=int, default=20, help="Requests per page")
+    args = parser.parse_args()
+
+    call_command("migrate", verbosity=0)
+    start = time.perf_counter()
+    generate_users(args.rows)
+    print(f"Generated {args.rows} users in {time.perf_counter() - start:.1f} s\n")
+
+    client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+    client.force_login(User.objects.create_superuser("bench", "bench@example.com", "bench"))
+    pages = max(1, args.rows // DefaultUserAdmin.list_per_page)
+
+    print(f"{'page':<10}{'admin':<10}{'request ms':>12}{'SQL ms':>10}{'queries':>9}")
+    for site in ("default", "large"):
+        url = f"/{site}/auth/user/"
+        first_page = client.get(url).content.decode()
+        next_link = NEXT_LINK_REGEX.search(first_page).group(1).replace("&amp;", "&")
+        for label, query in (
+            ("first", ""),
+            ("next", next_link),
+            ("middle", f"?p={pages // 2}"),
+            ("last", f"?p={pages}"),
+        ):
+            request_ms, sql_ms, queries = bench(client, url + query, args.iterations)
+            print(f"{label:<10}{site:<10}{request_ms:>12.2f}{sql_ms:>10.2f}{queries:>9}")
@@ -0,0 +1,111 @@
+"""
+Measure the per-render cost of each component across its variant matrix.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR: Path = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(PROJECT_DIR / "server"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret-key")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django_components import registry  # noqa: E402
+
+ACCORDION_ITEMS: list[dict[str, str]] = [
+    {"title": f"Section {index}", "content": f"<p>Content for section {index}</p>"}
+    for index in range(4)
+]
+
+# Each matrix is the fixed arguments plus every combination of the variant arguments
+VARIANT_MATRICES: dict[str, tuple[dict, dict[str, list]]] = {
+    "alert": (
+        {"heading": "Heading", "message": "Message"},
+        {"type": ["success", "warning", "error", "info"], "slim": [False, True]},
+    ),
+    "button": (
+        {"text": "Button"},
+        {
+            "type": [
+                "default",
+                "primary",
+                "secondary",
+                "accent-cool",
+                "base",
+                "outline",
+                "outline inverse",
+            ],
+            "size": [None, "big"],
+        },
+    ),
+    "card": (
+        {
+            "title": "Card",
+            "description": "Description",
+            "media_url": "/assets/img/example.jpg",
+            "link_url": "#",
+            "grid_col": "tablet:grid-col-6",
+        },
+        {
+            "flag": [False, True],
+            "header_first": [False, True],
+            "media_right": [False, True],
+            "media_inset": [False, True],
+            "media_exdent": [False, True],
+        },
+    ),
+    "accordion": (
+        {"items": ACCORDION_ITEMS},
+        {"bordered": [False, True], "multiselectable": [False, True]},
+    ),
+}
+
+
+def bench_render(name: str, kwargs: dict, iterations: int, repeat: int) -> float:
+    """Return the best mean time in microseconds to render a component with the given arguments"""
+    component_cls = registry.get(name)
+    component_cls.render(kwargs=kwargs, deps_strategy="ignore")  # warm template caches
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            component_cls.render(kwargs=kwargs, deps_strategy="ignore")
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1_000_000
+
+
+def bench_matrix(name: str, iterations: int, repeat: int) -> list[float]:
+    fixed, variants = VARIANT_MATRICES[name]
+    timings = []
+    for combination in itertools.product(*variants.values()):
+        kwargs = {**fixed, **dict(zip(variants, combination, strict=True))}
+        timings.append(bench_render(name, kwargs, iterations, repeat))
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark component renders per variant")
+    parser.add_argument("components", nargs="*", default=list(VARIANT_MATRICES))
+    parser.add_argument("--iterations", type=int, default=200, help="Renders per timing run")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Timing runs per variant, best is kept"
+    )
+    args = parser.parse_args()
+
+    print(f"{'component':<12}{'variants':>10}{'mean us':>12}{'min us':>12}{'max us':>12}")
+    for name in args.components:
+        timings = bench_matrix(name, args.iterations, args.repeat)
+        mean = sum(timings) / len(timings)
+        print(
+            f"{name:<12}{len(timings):>10}{mean:>12.1f}{min(timings):>12.1f}{max(timings):>12.1f}"
+        )
@@ -0,0 +1,143 @@
+"""
+Measure the critical-path request depth of pages, with and without their preload hints.
+
+A page's document is depth 1. Without hints, assets referenced by the HTML are discovered once
+it has arrived (depth 2) and fonts only once the stylesheet that declares them has arrived
+(depth 3). Assets listed in the `Link: rel=preload` header (or the matching 103 Early Hints)
+are requested alongside the document, at depth 1.
+
+The estimated first render time adds one round trip per depth plus the time to download the
+(gzipped) bytes requested at that depth, on a link throttled like Lighthouse's "Slow 4G" by default.
+
+    python scripts/bench_critical_path.py /demo/
+"""
+
+import argparse
+import gzip
+import os
+import re
+import sys
+from html.parser import HTMLParser
+from pathlib import Path
+
+PROJECT_DIR: Path = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(PROJECT_DIR / "server"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret-key")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles import finders  # noqa: E402
+from django.contrib.staticfiles.storage import staticfiles_storage  # noqa: E402
+from django.templatetags.static import static  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from core.preload import critical_fonts  # noqa: E402
+
+LINK_URL_REGEX = re.compile(r"<([^>]+)>[^,]*rel=preload")
+
+
+class HeadAssetParser(HTMLParser):
+    """Collects the render-blocking stylesheets and scripts of a document's `<head>`"""
+
+    def __init__(self):
+        super().__init__()
+        self.assets: list[str] = []
+        self.in_head = True
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "body":
+            self.in_head = False
+        elif self.in_head and tag == "link" and attrs.get("rel") == "stylesheet":
+            self.assets.append(attrs["href"])
+        elif self.in_head and tag == "script" and attrs.get("src"):
+            self.assets.append(attrs["src"])
+
+
+def static_name(url: str) -> str:
+    """Return the static path of an asset URL, undoing the manifest's fingerprinting"""
+    name = url.split("?")[0].removeprefix(settings.STATIC_URL)
+    hashed_files = getattr(staticfiles_storage, "hashed_files", {})
+    return next((path for path, hashed in hashed_files.items() if hashed == name), name)
+
+
+def transfer_size(content: bytes, url: str) -> int:
+    """Return the size of a response body, gzipped like Apache's mod_deflate does for text"""
+    return len(content) if url.endswith(".woff2") else len(gzip.compress(content))
+
+
+def asset_size(url: str) -> int:
+    name = static_name(url)
+    path = finders.find(name)
+    if not path and staticfiles_storage.exists(name):
+        path = staticfiles_storage.path(name)
+    if not path:
+        return 0
+    with open(path, "rb") as file:
+        return transfer_size(file.read(), name)
+
+
+def request_depths(client: Client, url: str) -> list[tuple[str, int, int, int]]:
+    """
+    Return the (asset, size, depth without hints, depth with hints) of a page and its critical
+    assets
+    """
+    response = client.get(url, HTTP_HOST=settings.ALLOWED_HOSTS[0])
+    body = b"".join(response.streaming_content) if response.streaming else response.content
+    preloaded = LINK_URL_REGEX.findall(response.get("Link", ""))
+
+    parser = HeadAssetParser()
+    parser.feed(body.decode())
+
+    depths = [(url, transfer_size(body, url), 1, 1)]
+    for asset in parser.assets:
+        depths.append((asset, asset_size(asset), 2, 1 if asset in preloaded else 2))
+
+    # Fonts are only discovered once the stylesheet declaring them has been parsed
+    for asset in parser.assets:
+        if asset.split("?")[0].endswith(".css"):
+            for font in map(static, critical_fonts(static_name(asset))):
+                depths.append((font, asset_size(font), 3, 1 if font in preloaded else 3))
+
+    return depths
+
+
+def first_render_ms(depths: list[tuple[int, int]], rtt_ms: float, mbps: float) -> float:
+    """Estimate the time until all (size, depth) requests are done, each depth in parallel"""
+    total = 0.0
+    for depth in range(1, max(depth for _, depth in depths) + 1):
+        size = sum(size for size, request_depth in depths if request_depth == depth)
+        total += rtt_ms + size * 8 / (mbps * 1000)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure critical-path request depth")
+    parser.add_argument("urls", nargs="*", default=["/demo/"])
+    parser.add_argument("--rtt", type=float, default=150, help="Round trip time in ms")
+    parser.add_argument("--mbps", type=float, default=1.6, help="Download bandwidth in Mbit/s")
+    args = parser.parse_args()
+
+    client = Client()
+    for url in args.urls:
+        depths = request_depths(client, url)
+        print(f"  {'request':<72}{'transfer bytes':>16}{'before':>8}{'after':>8}")
+        for asset, size, before, after in depths:
+            print(f"  {asset:<72}{size:>16}{before:>8}{after:>8}")
+
+        before = max(depth for _, _, depth, _ in depths)
+        after = max(depth for _, _, _, depth in depths)
+        print(f"  {'critical path depth':<88}{before:>8}{after:>8}")
+
+        before_ms = first_render_ms(
+            [(size, depth) for _, size, depth, _ in depths], args.rtt, args.mbps
+        )
+        after_ms = first_render_ms(
+            [(size, depth) for _, size, _, depth in depths], args.rtt, args.mbps
+        )
+        print(f"  {'estimated first render ms':<88}{before_ms:>8.0f}{after_ms:>8.0f}")
@@ -0,0 +1,164 @@
+"""
+Measure the database connection setup time spent in the request path.
+
+Requests go through Django's WSGI handler, so connections are closed or kept at the end of each
+request exactly like under mod_wsgi. The SQLite fallback database stands in for SQL Server, behind
+a stub ODBC layer that adds the cost of opening a connection (TCP + TLS + login, `--connect-ms`)
+and of the health check query that is sent before a reused connection serves a request (`--rtt`).
+With ODBC pooling, a connection closed by Django goes back to the stub pool and the next connect
+takes it without a handshake.
+
+    python scripts/bench_db_connections.py
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from wsgiref.util import setup_testing_defaults
+
+PROJECT_DIR: Path = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(PROJECT_DIR / "server"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret-key")
+# Force the SQLite fallback, the stub below plays the part of SQL Server
+os.environ["DB_HOST"] = ""
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.backends.sqlite3.base import DatabaseWrapper  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import path  # noqa: E402
+
+from core.db import connection_report  # noqa: E402
+
+# (label, CONN_MAX_AGE, CONN_HEALTH_CHECKS, ODBC pooling)
+CONFIGURATIONS: list[tuple[str, int, bool, bool]] = [
+    ("new connection per request", 0, False, False),
+    ("ODBC pooling", 0, False, True),
+    ("persistent + health checks", 600, True, False),
+    ("persistent + health checks + pooling", 600, True, True),
+]
+
+
+def query_view(request):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return HttpResponse(b"OK", content_type="text/plain")
+
+
+urlpatterns = [path("query/", query_view)]
+
+
+class PooledConnection:
+    """Database connection that goes back to the pool when Django closes it"""
+
+    def __init__(self, connection, pool: "StubOdbc"):
+        self._connection = connection
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            super().__setattr__(name, value)
+        else:
+            setattr(self._connection, name, value)
+
+    def close(self):
+        self._pool.idle.append(self._connection)
+
+
+class StubOdbc:
+    """Adds the latency of a remote SQL Server to the SQLite backend"""
+
+    def __init__(self, connect_ms: float, rtt_ms: float):
+        self.connect_ms = connect_ms
+        self.rtt_ms = rtt_ms
+        self.pooling = False
+        self.handshakes = 0
+        self.idle: list = []
+
+    def install(self) -> None:
+        get_new_connection = DatabaseWrapper.get_new_connection
+        stub = self
+
+        def stub_get_new_connection(wrapper, conn_params):
+            if stub.pooling and stub.idle:
+                return PooledConnection(stub.idle.pop(), stub)
+            time.sleep(stub.connect_ms / 1000)
+            stub.handshakes += 1
+            connection = get_new_connection(wrapper, conn_params)
+            return PooledConnection(connection, stub) if stub.pooling else connection
+
+        def stub_is_usable(wrapper):
+            time.sleep(stub.rtt_ms / 1000)
+            return True
+
+        DatabaseWrapper.get_new_connection = stub_get_new_connection
+        DatabaseWrapper.is_usable = stub_is_usable
+
+    def reset(self, pooling: bool) -> None:
+        connection.close()
+        for idle in self.idle:
+            idle.close()
+        self.idle.clear()
+        self.pooling = pooling
+        self.handshakes = 0
+
+
+def request(handler: WSGIHandler, url: str) -> None:
+    environ = {"PATH_INFO": url, "HTTP_HOST": settings.ALLOWED_HOSTS[0]}
+    setup_testing_defaults(environ)
+    response = handler(environ, lambda status, headers: None)
+    b"".join(response)
+    # Fires `request_finished`, which closes the connection unless it is persistent
+    response.close()
+
+
+def bench(handler: WSGIHandler, url: str, iterations: int) -> float:
+    """Return the mean request time in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        request(handler, url)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark database connection reuse")
+    parser.add_argument("--iterations", type=int, default=200, help="Requests per configuration")
+    parser.add_argument(
+        "--connect-ms", type=float, default=25, help="Time to open a connection in ms"
+    )
+    parser.add_argument("--rtt", type=float, default=0.5, help="Database round trip time in ms")
+    args = parser.parse_args()
+
+    stub = StubOdbc(args.connect_ms, args.rtt)
+    stub.install()
+
+    with override_settings(ROOT_URLCONF=__name__):
+        handler = WSGIHandler()
+        request(handler, "/query/")
+
+        print(f"{'configuration':<40}{'request ms':>12}{'handshakes':>12}{'opened':>8}")
+        for label, max_age, health_checks, pooling in CONFIGURATIONS:
+            stub.reset(pooling)
+            connection.settings_dict["CONN_MAX_AGE"] = max_age
+            connection.settings_dict["CONN_HEALTH_CHECKS"] = health_checks
+
+            opened = connection_report()["connections_opened"]
+            request_ms = bench(handler, "/query/", args.iterations)
+            opened = connection_report()["connections_opened"] - opened
+            print(f"{label:<40}{request_ms:>12.2f}{stub.handshakes:>12}{opened:>8}")
+
+        print(f"\nWorker report: {connection_report()}")
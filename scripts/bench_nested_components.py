@@ -0,0 +1,114 @@
+"""
+Compare deeply nested component renders with the "django" and "isolated" context behaviors.
+
+The page nests `--depth` wrapper components, each filled with an alert, a button, a card and an
+accordion whose arguments come from the view context. The page is rendered with a
+`RequestContext`, so the context processors add `request`, `user`, `messages`... on top of the
+`--context-keys` view variables, which is what "django" mode carries into every component.
+
+Each mode runs in its own process, as django-components reads the setting once:
+
+    python scripts/bench_nested_components.py --depth 20
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR: Path = Path(__file__).resolve().parent.parent
+
+MODES = ("django", "isolated")
+
+LEVEL_TEMPLATE = """
+{% component "bench_section" depth=DEPTH %}
+  {% component "alert" type="info" heading=title message=message %}{% endcomponent %}
+  {% component "button" text=title url=url %}{% endcomponent %}
+  {% component "card" title=title description=message link_url=url %}{% endcomponent %}
+  {% component "accordion" items=accordion_items %}{% endcomponent %}
+  NESTED
+{% endcomponent %}
+"""
+
+
+def page_source(depth: int) -> str:
+    source = ""
+    for level in reversed(range(depth)):
+        source = LEVEL_TEMPLATE.replace("DEPTH", str(level)).replace("NESTED", source)
+    return source
+
+
+def bench_mode(depth: int, context_keys: int, iterations: int, repeat: int) -> float:
+    """Return the best mean time in milliseconds to render the page in the configured mode"""
+    import django
+
+    django.setup()
+
+    from django.contrib.auth.models import AnonymousUser
+    from django.template import RequestContext, engines
+    from django.test import RequestFactory
+
+    from django_components import Component, register
+
+    @register("bench_section")
+    class Section(Component):
+        template = (
+            '<section data-depth="{{ depth }}">{% slot "content" default %}{% endslot %}</section>'
+        )
+
+        def get_context_data(self, depth):
+            return {"depth": depth}
+
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+    view_context = {f"variable_{index}": index for index in range(context_keys)}
+    view_context.update(
+        title="Title",
+        message="Message",
+        url="/details/",
+        accordion_items=[
+            {"title": f"Section {index}", "content": f"<p>Section {index}</p>"}
+            for index in range(4)
+        ],
+    )
+
+    template = engines["django"].engine.from_string(page_source(depth))
+    template.render(RequestContext(request, view_context))
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            template.render(RequestContext(request, view_context))
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark nested components per context mode")
+    parser.add_argument("--depth", type=int, default=10, help="Nesting depth of the page")
+    parser.add_argument(
+        "--context-keys", type=int, default=100, help="Variables in the view context"
+    )
+    parser.add_argument("--iterations", type=int, default=20, help="Renders per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per mode, best is kept")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        sys.path.insert(0, str(PROJECT_DIR / "server"))
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
+        os.environ.setdefault("SECRET_KEY", "benchmark-only-secret-key")
+        os.environ["COMPONENTS_CONTEXT_BEHAVIOR"] = args.mode
+        render_ms = bench_mode(args.depth, args.context_keys, args.iterations, args.repeat)
+        print(f"{args.mode:<12}{args.depth:>8}{args.depth * 5:>12}{render_ms:>12.2f}")
+        sys.exit()
+
+    print(f"{'mode':<12}{'depth':>8}{'components':>12}{'render ms':>12}")
+    for mode in MODES:
+        subprocess.run(
+            [sys.executable, __file__, "--mode", mode, *sys.argv[1:]],
+            check=True,
+        )
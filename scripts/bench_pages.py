@@ -0,0 +1,86 @@
+"""
+Measure response size and server-side render time of pages through Django's test client.
+
+The first chunk time is how long it takes until the first bytes of the body are ready, which
+is the whole render unless the page is streamed.
+
+Settings come from the environment as usual, so compare configurations by running it twice:
+
+    COMPACT_TEMPLATES=false python scripts/bench_pages.py /demo/
+    COMPACT_TEMPLATES=true python scripts/bench_pages.py /demo/
+    STREAM_TEMPLATES=true python scripts/bench_pages.py /demo/
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR: Path = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(PROJECT_DIR / "server"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret-key")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.test import Client  # noqa: E402
+
+
+def get_page(client: Client, url: str) -> tuple[bytes, float]:
+    """Return the body of a page and the time in seconds until its first chunk was ready"""
+    start = time.perf_counter()
+    response = client.get(url, HTTP_HOST=settings.ALLOWED_HOSTS[0])
+    if not response.streaming:
+        return response.content, time.perf_counter() - start
+
+    chunks = iter(response.streaming_content)
+    first_chunk = next(chunks, b"")
+    first_chunk_time = time.perf_counter() - start
+    return first_chunk + b"".join(chunks), first_chunk_time
+
+
+def bench_page(
+    client: Client, url: str, iterations: int, repeat: int
+) -> tuple[int, int, float, float]:
+    """
+    Return the body size, gzipped body size and the best mean first chunk and render times in
+    milliseconds
+    """
+    body, _ = get_page(client, url)
+
+    best = best_first_chunk = float("inf")
+    for _ in range(repeat):
+        first_chunk_total = 0.0
+        start = time.perf_counter()
+        for _ in range(iterations):
+            first_chunk_total += get_page(client, url)[1]
+        best = min(best, time.perf_counter() - start)
+        best_first_chunk = min(best_first_chunk, first_chunk_total)
+    return (
+        len(body),
+        len(gzip.compress(body)),
+        best_first_chunk / iterations * 1000,
+        best / iterations * 1000,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark page size and render time")
+    parser.add_argument("urls", nargs="*", default=["/demo/"])
+    parser.add_argument("--iterations", type=int, default=50, help="Requests per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per page, best is kept")
+    args = parser.parse_args()
+
+    client = Client()
+    print(f"{'url':<20}{'bytes':>10}{'gzip bytes':>12}{'first chunk ms':>16}{'render ms':>12}")
+    for url in args.urls:
+        size, gzip_size, first_chunk_ms, render_ms = bench_page(
+            client, url, args.iterations, args.repeat
+        )
+        print(f"{url:<20}{size:>10}{gzip_size:>12}{first_chunk_ms:>16.2f}{render_ms:>12.2f}")
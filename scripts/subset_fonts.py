@@ -0,0 +1,217 @@
+"""
+Subset the web fonts of the compiled stylesheet to the glyphs the site uses.
+
+Runs after the Sass compile (`npx gulp compile` calls it). For every `@font-face` rule in
+`public/css/styles.css`, the WOFF2 font under `public/fonts` is subset to `UNICODE_RANGES` plus
+any other character used by the project templates and written to `public/webfonts`. The rule
+is then rewritten to load the subset with a matching `unicode-range`, and the source map is
+shifted so it still lines up with the stylesheet.
+
+`public/fonts` keeps the full USWDS typefaces as the source of the subsets and is left out of
+`collectstatic`, so only the subset WOFF2 files are deployed.
+
+The subsets only cover Latin text and the characters of the templates, not text from the
+database or user input: with its `unicode-range`, a character outside of the subset is drawn with
+the next font of the `font-family` stack (the system fonts USWDS lists after its typefaces).
+Add the scripts such text may use to `UNICODE_RANGES`.
+
+    python scripts/subset_fonts.py
+"""
+
+import argparse
+import html
+import json
+import re
+from pathlib import Path
+
+from fontTools import subset
+
+PROJECT_DIR: Path = Path(__file__).resolve().parent.parent
+PUBLIC_DIR: Path = PROJECT_DIR / "public"
+
+SOURCE_DIR = "fonts"
+SUBSET_DIR = "webfonts"
+
+# Latin text and the typographic punctuation USWDS uses (dashes, quotes, bullet, ellipsis...)
+UNICODE_RANGES: list[str] = [
+    "U+0020-007E",
+    "U+00A0-00FF",
+    "U+0131",
+    "U+0152-0153",
+    "U+02C6",
+    "U+02DA",
+    "U+02DC",
+    "U+2013-2014",
+    "U+2018-201A",
+    "U+201C-201E",
+    "U+2022",
+    "U+2026",
+    "U+2039-203A",
+    "U+20AC",
+    "U+2122",
+]
+
+# Text of these is scanned for characters outside of UNICODE_RANGES
+TEMPLATE_GLOBS: list[str] = ["templates/**/*.html", "components/**/*.html"]
+
+FONT_FACE_REGEX = re.compile(r"@font-face\s*\{(?P<body>[^}]*)\}")
+FONT_URL_REGEX = re.compile(r"""url\(\s*["']?(?P<url>[^"')]+\.woff2)["']?\s*\)""")
+
+BASE64_DIGITS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+
+def parse_unicode_range(value: str) -> set[int]:
+    """Return the code points of a CSS `unicode-range` entry, e.g. "U+0020-007E" """
+    start, _, end = value.removeprefix("U+").partition("-")
+    return set(range(int(start, 16), int(end or start, 16) + 1))
+
+
+def format_unicode_ranges(unicodes: set[int]) -> str:
+    """Return the CSS `unicode-range` value covering the given code points"""
+    ranges = []
+    for code_point in sorted(unicodes):
+        if ranges and ranges[-1][1] == code_point - 1:
+            ranges[-1][1] = code_point
+        else:
+            ranges.append([code_point, code_point])
+    return ",".join(
+        f"U+{start:04X}" if start == end else f"U+{start:04X}-{end:04X}" for start, end in ranges
+    )
+
+
+def used_unicodes() -> set[int]:
+    """Return the code points to keep: `UNICODE_RANGES` plus whatever the templates use"""
+    unicodes = set().union(*map(parse_unicode_range, UNICODE_RANGES))
+    for pattern in TEMPLATE_GLOBS:
+        for path in PROJECT_DIR.glob(pattern):
+            text = html.unescape(path.read_text(encoding="utf-8"))
+            unicodes.update(ord(char) for char in text if char.isprintable())
+    return unicodes
+
+
+def subset_font(source: Path, target: Path, unicodes: set[int]) -> None:
+    options = subset.Options()
+    options.flavor = "woff2"
+
+    font = subset.load_font(str(source), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    subset.save_font(font, str(target), options)
+
+
+def decode_vlq(segment: str) -> list[int]:
+    values, value, shift = [], 0, 0
+    for char in segment:
+        digit = BASE64_DIGITS.index(char)
+        value += (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+        else:
+            values.append(-(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    return values
+
+
+def encode_vlq(values: list[int]) -> str:
+    segment = ""
+    for value in values:
+        value = (-value << 1) | 1 if value < 0 else value << 1
+        while True:
+            digit, value = value & 31, value >> 5
+            segment += BASE64_DIGITS[digit | (32 if value else 0)]
+            if not value:
+                break
+    return segment
+
+
+def shift_source_map(source_map: dict, css: str, edits: list[tuple[int, int, str]]) -> None:
+    """Move the mappings of generated columns after each edit by the change in length"""
+    shifts: dict[int, list[tuple[int, int]]] = {}
+    for start, end, text in edits:
+        line = css.count("\n", 0, start)
+        column = end - (css.rfind("\n", 0, start) + 1)
+        shifts.setdefault(line, []).append((column, len(text) - (end - start)))
+
+    lines = source_map["mappings"].split(";")
+    for line, line_shifts in shifts.items():
+        if line >= len(lines) or not lines[line]:
+            continue
+        segments = [decode_vlq(segment) for segment in lines[line].split(",")]
+
+        column = previous = 0
+        for values in segments:
+            column += values[0]
+            shifted = column + sum(delta for end, delta in line_shifts if end <= column)
+            values[0], previous = shifted - previous, shifted
+        lines[line] = ",".join(encode_vlq(values) for values in segments)
+    source_map["mappings"] = ";".join(lines)
+
+
+def rewrite_stylesheet(css_path: Path, unicodes: set[int]) -> list[tuple[Path, Path]]:
+    """
+    Point the `@font-face` rules of a stylesheet at the subset fonts.
+
+    Returns the (source, subset) font paths of every rule.
+    """
+    css = css_path.read_text(encoding="utf-8")
+    unicode_range = format_unicode_ranges(unicodes)
+
+    fonts = []
+    edits: list[tuple[int, int, str]] = []
+    for face in FONT_FACE_REGEX.finditer(css):
+        url = FONT_URL_REGEX.search(face["body"])
+        if not url:
+            continue
+        # Path of the font below `fonts/` (or `webfonts/` if a previous run rewrote the rule)
+        path = (css_path.parent / url["url"]).resolve().relative_to(PUBLIC_DIR)
+        name = Path(*path.parts[1:])
+        fonts.append((PUBLIC_DIR / SOURCE_DIR / name, PUBLIC_DIR / SUBSET_DIR / name))
+
+        if path.parts[0] == SOURCE_DIR:
+            offset = face.start("body")
+            start, end = offset + url.start("url"), offset + url.end("url")
+            subset_url = url["url"].replace(f"{SOURCE_DIR}/", f"{SUBSET_DIR}/", 1)
+            edits.append((start, end, subset_url))
+            edits.append((face.end("body"), face.end("body"), f";unicode-range:{unicode_range}"))
+
+    output = css
+    for start, end, text in sorted(edits, reverse=True):
+        output = output[:start] + text + output[end:]
+    css_path.write_text(output, encoding="utf-8")
+
+    map_path = css_path.with_name(css_path.name + ".map")
+    if edits and map_path.exists():
+        source_map = json.loads(map_path.read_text(encoding="utf-8"))
+        shift_source_map(source_map, css, edits)
+        map_json = json.dumps(source_map, ensure_ascii=False, separators=(",", ":"))
+        map_path.write_text(map_json, encoding="utf-8")
+
+    return fonts
+
+
+def directory_size(path: Path, pattern: str = "*") -> int:
+    return sum(file.stat().st_size for file in path.rglob(pattern) if file.is_file())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Subset web fonts to the glyphs the site uses")
+    parser.add_argument("--css", type=Path, default=PUBLIC_DIR / "css" / "styles.css")
+    args = parser.parse_args()
+
+    unicodes = used_unicodes()
+    fonts = rewrite_stylesheet(args.css.resolve(), unicodes)
+
+    for source, target in fonts:
+        subset_font(source, target, unicodes)
+
+    print(f"{'font':<56}{'bytes':>10}{'subset':>10}")
+    for source, target in fonts:
+        name = str(source.relative_to(PUBLIC_DIR / SOURCE_DIR))
+        print(f"{name:<56}{source.stat().st_size:>10}{target.stat().st_size:>10}")
+    print(
+        f"{'total (all formats / subset woff2)':<56}"
+        f"{directory_size(PUBLIC_DIR / SOURCE_DIR):>10}{directory_size(PUBLIC_DIR / SUBSET_DIR):>10}"
+    )
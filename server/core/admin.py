@@ -0,0 +1,211 @@
+"""
+Admin changelists that stay fast on tables with millions of rows.
+
+Subclass `LargeTableAdmin` instead of `admin.ModelAdmin` for such models. Compared to the
+default changelist it:
+
+- doesn't count the unfiltered table next to the filtered results (`show_full_result_count`)
+- takes the row count of an unfiltered table above `estimated_count_threshold` rows from the
+  database statistics instead of `SELECT COUNT(*)`: `sys.dm_db_partition_stats` on SQL Server,
+  `sqlite_stat1` (written by `ANALYZE`) on SQLite, so the count and page numbers are estimates
+- pages with keyset pagination when the list is ordered by the primary key (the default): the
+  previous / next page links carry the first / last key of the current page, and the next page
+  is read with `WHERE pk < key` on the index instead of skipping rows with `OFFSET`
+
+Jumping to a page that isn't adjacent to the current one (the page number links, a page number
+typed in the URL, a stale cursor) still uses `OFFSET`, on the primary key alone: the first key
+of the page is read with `OFFSET (page - 1) * per_page` on the index, then its rows with
+`WHERE pk <= key`. That skips index entries rather than rows, but still costs in proportion to
+the page number, so pages deep into a table are slower than walking to them would be.
+"""
+
+from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Model, QuerySet
+from django.http import HttpRequest
+from django.utils.functional import cached_property
+
+# Query string parameters of the keyset links, holding a key of the current page
+AFTER_VAR = "_after"
+BEFORE_VAR = "_before"
+
+ESTIMATED_COUNT_QUERIES = {
+    # Rows of the heap or clustered index, kept up to date by the engine without a scan
+    "microsoft": """
+        SELECT SUM(row_count) FROM sys.dm_db_partition_stats
+        WHERE object_id = OBJECT_ID(%s) AND index_id IN (0, 1)
+    """,
+    # The first number of each index's statistics is the row count of the table
+    "sqlite": "SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s",
+}
+
+
+def estimated_count(queryset: QuerySet) -> int | None:
+    """Return the row count of a model's table from the database statistics, if available"""
+    connection = connections[queryset.db]
+    query = ESTIMATED_COUNT_QUERIES.get(connection.vendor)
+    if query is None:
+        return None
+    table = queryset.model._meta.db_table
+    if connection.vendor == "microsoft":
+        table = connection.ops.quote_name(table)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(query, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        # Missing statistics, or no VIEW DATABASE STATE permission
+        return None
+    return int(row[0]) if row and row[0] is not None else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that estimates the count of unfiltered querysets of large tables"""
+
+    def __init__(self, *args, estimated_count_threshold: int = 100_000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estimated_count_threshold = estimated_count_threshold
+        self.estimated = False
+
+    @cached_property
+    def count(self) -> int:
+        query = self.object_list.query
+        if not query.where and not query.distinct and not query.is_sliced:
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= self.estimated_count_threshold:
+                self.estimated = True
+                return estimate
+        return super().count
+
+
+class KeysetPaginator(EstimatedCountPaginator):
+    """
+    Paginator that reads the pages of querysets ordered by primary key with keyset pagination.
+
+    `cursor` is the (page number, `AFTER_VAR` or `BEFORE_VAR`, key) of the page requested by a
+    link of `KeysetChangeList`, and `cursor_for()` makes the cursor of the adjacent pages.
+    """
+
+    def __init__(self, *args, cursor: tuple[int, str, object] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor = cursor
+        # (page number, first key, last key) of the page that was read
+        self.bounds: tuple[int, object, object] | None = None
+
+    @cached_property
+    def descending(self) -> bool | None:
+        """Return whether the keys descend, or None if the list isn't ordered by key only"""
+        ordering = self.object_list.query.order_by
+        if len(ordering) != 1 or not isinstance(ordering[0], str):
+            return None
+        pk = self.object_list.model._meta.pk
+        if ordering[0].removeprefix("-") not in ("pk", pk.name, pk.attname):
+            return None
+        return ordering[0].startswith("-")
+
+    def page(self, number) -> Page:
+        if self.descending is None:
+            return super().page(number)
+        number = self.validate_number(number)
+        limit = self.per_page + (self.orphans if number == self.num_pages else 0)
+        queryset = self.object_list
+        keys = queryset.values_list("pk", flat=True)
+        after, from_, before = ("lt", "lte", "gt") if self.descending else ("gt", "gte", "lt")
+
+        if self.cursor and self.cursor[0] == number and self.cursor[1] == AFTER_VAR:
+            rows = queryset.filter(**{f"pk__{after}": self.cursor[2]})[:limit]
+        else:
+            if self.cursor and self.cursor[0] == number and self.cursor[1] == BEFORE_VAR:
+                # The page ends right before the key, its first key is per_page keys back
+                previous = keys.filter(**{f"pk__{before}": self.cursor[2]}).reverse()
+                first = list(previous[: self.per_page])[-1:]
+            elif number == 1:
+                first = None
+            else:
+                # Not an adjacent page: falls back to OFFSET (see the module docstring), on the
+                # narrowest index instead of the rows to skip
+                offset = (number - 1) * self.per_page
+                first = list(keys[offset : offset + 1])
+            if first is None:
+                rows = queryset[:limit]
+            elif first:
+                rows = queryset.filter(**{f"pk__{from_}": first[0]})[:limit]
+            else:
+                rows = queryset.none()
+
+        # Evaluated here for the keys of the page, the changelist reuses the fetched rows
+        objects = list(rows)
+        if objects:
+            self.bounds = number, objects[0].pk, objects[-1].pk
+        return self._get_page(rows, number, self)
+
+    def cursor_for(self, number) -> tuple[str, object] | None:
+        """Return the query string parameter and key that lead to an adjacent page"""
+        if self.bounds is None:
+            return None
+        current, first, last = self.bounds
+        if number == current + 1:
+            return AFTER_VAR, last
+        if number == current - 1 and number > 1:
+            return BEFORE_VAR, first
+        return None
+
+
+def keyset_cursor(request: HttpRequest, model: type[Model]) -> tuple[int, str, object] | None:
+    """Return the keyset cursor in the query string of a changelist request"""
+    try:
+        number = int(request.GET.get(PAGE_VAR, 1))
+    except ValueError:
+        return None
+    for var in (AFTER_VAR, BEFORE_VAR):
+        if var in request.GET:
+            try:
+                return number, var, model._meta.pk.to_python(request.GET[var])
+            except ValidationError:
+                return None
+    return None
+
+
+class KeysetChangeList(ChangeList):
+    """Changelist whose page links carry the keyset cursor of `KeysetPaginator`"""
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(AFTER_VAR, None)
+        lookup_params.pop(BEFORE_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        new_params = dict(new_params or {})
+        remove = [*(remove or []), AFTER_VAR, BEFORE_VAR]
+        paginator = getattr(self, "paginator", None)
+        if PAGE_VAR in new_params and isinstance(paginator, KeysetPaginator):
+            cursor = paginator.cursor_for(new_params[PAGE_VAR])
+            if cursor:
+                new_params[cursor[0]] = cursor[1]
+        return super().get_query_string(new_params, remove)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """`ModelAdmin` for tables with millions of rows, see the module docstring"""
+
+    paginator = KeysetPaginator
+    show_full_result_count = False
+    # Unfiltered tables with more rows than this show their estimated count
+    estimated_count_threshold = 100_000
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset,
+            per_page,
+            orphans,
+            allow_empty_first_page,
+            estimated_count_threshold=self.estimated_count_threshold,
+            cursor=keyset_cursor(request, queryset.model),
+        )
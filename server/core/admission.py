@@ -0,0 +1,255 @@
+"""
+Admission control: turn requests away quickly instead of queueing them until they time out.
+
+`AdmissionControlMiddleware` answers `503 Service Unavailable` with a `Retry-After` header when
+the worker process is overloaded:
+
+- `ADMISSION_MAX_IN_FLIGHT` requests are already being handled by the process
+- the request waited in the server's queue for longer than `ADMISSION_MAX_QUEUE_MS` before
+  reaching Django (from mod_wsgi's `mod_wsgi.request_start`, or the `X-Request-Start` header
+  of a proxy in `ADMISSION_TRUSTED_PROXIES`)
+
+It also enforces optional token-bucket rate limits, per client address (`429 Too Many Requests`)
+and for the whole site (`503`). Behind the proxies in `ADMISSION_TRUSTED_PROXIES`, the client
+address is the last one of `X-Forwarded-For` that isn't one of them. The buckets live in Redis, so the limits hold across worker
+processes and servers, and a Lua script takes the tokens of both atomically. If Redis can't be
+reached the limits are enforced by each process on its own until it's back.
+
+Paths in `ADMISSION_EXEMPT_PATHS` (the health check) are never turned away, so a load balancer
+doesn't take a node out of rotation because it's shedding load.
+"""
+
+import ipaddress
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseBase
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .metrics import SHED_REQUESTS
+from .streaming import call_on_complete
+
+logger = logging.getLogger(__name__)
+
+# Takes a token from each bucket in KEYS if all of them have one, ARGV holds the rate (tokens
+# per second) and burst of each bucket. Returns 0 when allowed, otherwise the index (from 1) of
+# the first empty bucket and the seconds until it has a token again
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    local bucket = redis.call('HMGET', key, 'tokens', 'updated')
+    local available = tonumber(bucket[1]) or burst
+    local elapsed = math.max(0, now - (tonumber(bucket[2]) or now))
+    tokens[i] = math.min(burst, available + elapsed * rate)
+    if tokens[i] < 1 then
+        return {i, tostring((1 - tokens[i]) / rate)}
+    end
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    redis.call('HSET', key, 'tokens', tokens[i] - 1, 'updated', now)
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return {0, '0'}
+"""
+
+# Client buckets kept by each process while Redis is unreachable
+LOCAL_CLIENT_BUCKETS = 10_000
+
+# Seconds to wait after a Redis error before trying Redis again
+REDIS_RETRY_INTERVAL = 30
+
+
+class TokenBucket:
+    """In-process token bucket, used while Redis is unreachable"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def refill(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+
+class RateLimiter:
+    """Per-client and global token buckets, in Redis or in the process if Redis is down"""
+
+    def __init__(self):
+        self.script = None
+        self.redis_down_until = 0.0
+        self.lock = threading.Lock()
+        self.local_global: TokenBucket | None = None
+        self.local_clients: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def limits(self, client: str) -> list[tuple[str, str, float, int]]:
+        """Return the (kind, key, rate, burst) of the limits that apply to a client"""
+        limits = []
+        if settings.ADMISSION_CLIENT_RATE > 0:
+            rate, burst = settings.ADMISSION_CLIENT_RATE, settings.ADMISSION_CLIENT_BURST
+            limits.append(("client", f"admission:client:{client}", rate, burst))
+        if settings.ADMISSION_GLOBAL_RATE > 0:
+            rate, burst = settings.ADMISSION_GLOBAL_RATE, settings.ADMISSION_GLOBAL_BURST
+            limits.append(("global", "admission:global", rate, burst))
+        return limits
+
+    def take(self, client: str) -> tuple[str, float] | None:
+        """Take a token for a request, returns the (kind, retry seconds) of an exceeded limit"""
+        limits = self.limits(client)
+        if not limits:
+            return None
+        if time.monotonic() >= self.redis_down_until:
+            try:
+                return self.take_redis(limits)
+            except RedisError as error:
+                logger.warning("Rate limiting locally, Redis is unreachable: %s", error)
+                self.redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+        return self.take_local(client, limits)
+
+    def take_redis(self, limits: list[tuple[str, str, float, int]]) -> tuple[str, float] | None:
+        if self.script is None:
+            self.script = get_redis_connection("default").register_script(TOKEN_BUCKET_SCRIPT)
+        args = [value for _, _, rate, burst in limits for value in (rate, burst)]
+        exceeded, retry_after = self.script(keys=[key for _, key, _, _ in limits], args=args)
+        if not exceeded:
+            return None
+        return limits[int(exceeded) - 1][0], float(retry_after)
+
+    def take_local(
+        self, client: str, limits: list[tuple[str, str, float, int]]
+    ) -> tuple[str, float] | None:
+        with self.lock:
+            buckets = []
+            for kind, _, rate, burst in limits:
+                if kind == "global":
+                    if self.local_global is None or self.local_global.rate != rate:
+                        self.local_global = TokenBucket(rate, burst)
+                    bucket = self.local_global
+                else:
+                    bucket = self.local_clients.pop(client, None) or TokenBucket(rate, burst)
+                    self.local_clients[client] = bucket
+                    if len(self.local_clients) > LOCAL_CLIENT_BUCKETS:
+                        self.local_clients.popitem(last=False)
+                buckets.append((kind, bucket))
+
+            for kind, bucket in buckets:
+                if bucket.refill() < 1:
+                    return kind, (1 - bucket.tokens) / bucket.rate
+            for _, bucket in buckets:
+                bucket.tokens -= 1
+        return None
+
+
+def is_trusted_proxy(address: str) -> bool:
+    try:
+        address = ipaddress.ip_address(address.strip())
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network) for network in settings.ADMISSION_TRUSTED_PROXIES
+    )
+
+
+def client_address(request: HttpRequest) -> str:
+    """Return the address of the client, as reported by the trusted proxies it came through"""
+    address = request.META.get("REMOTE_ADDR", "")
+    if not is_trusted_proxy(address):
+        return address
+    # Each proxy appends the address it got the request from, the ones before the first
+    # untrusted address (from the right) may have been made up by the client
+    forwarded = [
+        forwarded.strip()
+        for forwarded in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+        if forwarded.strip()
+    ]
+    for forwarded_address in reversed(forwarded):
+        if not is_trusted_proxy(forwarded_address):
+            return forwarded_address
+    return forwarded[0] if forwarded else address
+
+
+def queue_time(request: HttpRequest) -> float | None:
+    """Return the seconds a request waited before Django got it, if the server says when it came"""
+    start = request.META.get("mod_wsgi.request_start", "")
+    if not start and is_trusted_proxy(request.META.get("REMOTE_ADDR", "")):
+        # Only from a proxy, a client could send any time to get past the queue limit
+        start = request.META.get("HTTP_X_REQUEST_START", "").removeprefix("t=")
+    try:
+        start = float(start)
+    except ValueError:
+        return None
+    # Microseconds (mod_wsgi, Apache's %t), milliseconds or seconds since the epoch
+    if start > 1e14:
+        start /= 1_000_000
+    elif start > 1e11:
+        start /= 1000
+    return max(0.0, time.time() - start)
+
+
+class AdmissionControlMiddleware:
+    """Sheds load with fast 503 / 429 responses, see the module docstring"""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponseBase]):
+        self.get_response = get_response
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.rate_limiter = RateLimiter()
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if not settings.ADMISSION_CONTROL or request.path in settings.ADMISSION_EXEMPT_PATHS:
+            return self.get_response(request)
+
+        waited = queue_time(request)
+        if waited is not None and waited * 1000 > settings.ADMISSION_MAX_QUEUE_MS > 0:
+            return self.reject("queue", 503, settings.ADMISSION_RETRY_AFTER)
+
+        exceeded = self.rate_limiter.take(client_address(request))
+        if exceeded:
+            kind, retry_after = exceeded
+            return self.reject(kind, 429 if kind == "client" else 503, retry_after)
+
+        with self.lock:
+            admitted = not 0 < settings.ADMISSION_MAX_IN_FLIGHT <= self.in_flight
+            if admitted:
+                self.in_flight += 1
+        if not admitted:
+            return self.reject("in_flight", 503, settings.ADMISSION_RETRY_AFTER)
+
+        def finish():
+            with self.lock:
+                self.in_flight -= 1
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            finish()
+            raise
+        call_on_complete(response, finish)
+        return response
+
+    def reject(self, reason: str, status: int, retry_after: float) -> HttpResponse:
+        SHED_REQUESTS.labels(reason).inc()
+        response = HttpResponse(
+            b"Service busy, please retry later", content_type="text/plain", status=status
+        )
+        response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        response["Cache-Control"] = "no-store"
+        # Counted in the metrics instead, logging every shed request would add to the load
+        response._has_been_logged = True
+        return response
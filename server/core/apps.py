@@ -1,6 +1,26 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.contrib.staticfiles.apps import StaticFilesConfig as BaseStaticFilesConfig
 
 
 class CoreConfig(AppConfig):
+    # Picked for "core" in INSTALLED_APPS, the module has more than one app config
+    default = True
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from . import checks, db, metrics  # noqa: F401 (checks registers the system checks)
+
+        db.install()
+        metrics.install()
+        if settings.MEMORY_DIAGNOSTICS:
+            from . import memory
+
+            memory.install()
+
+
+class StaticFilesConfig(BaseStaticFilesConfig):
+    # `public/fonts` holds the full USWDS typefaces that `scripts/subset_fonts.py` subsets into
+    # `public/webfonts`, the stylesheet only loads the subsets
+    ignore_patterns = [*BaseStaticFilesConfig.ignore_patterns, "fonts/*"]
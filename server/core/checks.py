@@ -0,0 +1,140 @@
+"""
+System checks of the project's components.
+
+`check_component_context` flags component templates that use variables their component doesn't
+return from `get_context_data()` (or `get_template_data()`). Those can only come from the
+context of the template that renders the component (a view variable, or the `request`, `user`,
+`messages`... of the context processors), which components no longer see with
+`COMPONENTS_CONTEXT_BEHAVIOR` "isolated": an error in that mode, a warning in "django" mode,
+where it blocks switching.
+"""
+
+import ast
+import inspect
+import textwrap
+
+from django.core import checks
+from django.template import NodeList, engines
+from django.template.base import FilterExpression
+from django.template.defaulttags import ForNode, WithNode
+from django.template.smartif import TokenBase
+
+from django_components import Component, ContextBehavior, registry
+from django_components.app_settings import app_settings
+
+# Variables set by the template language itself
+TEMPLATE_NAMES = frozenset(("forloop", "block", "True", "False", "None"))
+
+
+def provided_names(component_cls: type[Component]) -> set[str] | None:
+    """
+    Return the variables a component passes to its template, the keys of the dict literals
+    returned by `get_template_data()` or `get_context_data()`, or None if they can't be read
+    """
+    for method_name in ("get_template_data", "get_context_data"):
+        method = getattr(component_cls, method_name)
+        if method is not getattr(Component, method_name):
+            break
+    else:
+        # Components without data methods, like django-components' own, set their context
+        # in other ways
+        return None
+    try:
+        source = textwrap.dedent(inspect.getsource(method))
+    except (OSError, TypeError):
+        return None
+
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if not isinstance(node, ast.Return):
+            continue
+        if not isinstance(node.value, ast.Dict):
+            return None
+        for key in node.value.keys:
+            if not (isinstance(key, ast.Constant) and isinstance(key.value, str)):
+                return None
+            names.add(key.value)
+    return names
+
+
+def expressions(value):
+    """Yield the filter expressions of a node attribute, including those of `{% if %}` conditions"""
+    if isinstance(value, FilterExpression):
+        yield value
+    elif isinstance(value, TokenBase):
+        for operand in (getattr(value, "value", None), value.first, value.second):
+            yield from expressions(operand)
+    elif isinstance(value, (list, tuple)) and not isinstance(value, NodeList):
+        for item in value:
+            yield from expressions(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from expressions(item)
+
+
+def variable_names(expression: FilterExpression) -> set[str]:
+    """Return the top-level names of the variables an expression looks up"""
+    variables = [expression.var]
+    variables += [arg for _, args in expression.filters for is_var, arg in args if is_var]
+    return {var.lookups[0] for var in variables if getattr(var, "lookups", None)}
+
+
+def implicit_names(nodelist: NodeList, bound: frozenset[str]) -> set[str]:
+    """Return the variables used by a compiled template that aren't in `bound`"""
+    names = set()
+    for node in nodelist:
+        # `{% if %}` keeps its branches in `conditions_nodelists`, `nodelist` is only a copy
+        if hasattr(node, "conditions_nodelists"):
+            for condition, branch in node.conditions_nodelists:
+                for expression in expressions(condition):
+                    names |= variable_names(expression) - bound
+                names |= implicit_names(branch, bound)
+            continue
+
+        child_nodelist_attrs = set(node.child_nodelists)
+        for attr, value in vars(node).items():
+            if attr not in child_nodelist_attrs:
+                for expression in expressions(value):
+                    names |= variable_names(expression) - bound
+
+        inner = bound
+        if isinstance(node, ForNode):
+            inner = bound | set(node.loopvars)
+        elif isinstance(node, WithNode):
+            inner = bound | set(node.extra_context)
+        for attr in child_nodelist_attrs:
+            child_nodelist = getattr(node, attr, None)
+            if child_nodelist:
+                names |= implicit_names(child_nodelist, inner)
+    return names
+
+
+@checks.register(checks.Tags.templates)
+def check_component_context(app_configs, **kwargs):
+    isolated = app_settings.CONTEXT_BEHAVIOR == ContextBehavior.ISOLATED
+    engine = engines["django"]
+    messages = []
+    for name, component_cls in registry.all().items():
+        provided = provided_names(component_cls)
+        if provided is None:
+            continue
+        if component_cls.template_file:
+            template = engine.get_template(component_cls.template_file).template
+        elif isinstance(component_cls.template, str):
+            template = engine.from_string(component_cls.template).template
+        else:
+            continue
+
+        implicit = implicit_names(template.nodelist, frozenset(provided | TEMPLATE_NAMES))
+        if not implicit:
+            continue
+        message = (
+            f"The template of component '{name}' uses {', '.join(sorted(implicit))}, which the "
+            "component doesn't return from get_context_data()."
+        )
+        hint = "Pass the values as arguments of the component and return them."
+        if isolated:
+            messages.append(checks.Error(message, hint=hint, obj=component_cls, id="core.E001"))
+        else:
+            messages.append(checks.Warning(message, hint=hint, obj=component_cls, id="core.W001"))
+    return messages
@@ -0,0 +1,77 @@
+"""
+Per-worker report of database connection usage.
+
+Every connection Django opens is counted through the `connection_created` signal, so the
+report shows how often connections are reused (`DB_CONN_MAX_AGE`) rather than opened for a
+request. Each worker process logs its report when it exits, and every
+`DB_CONNECTION_REPORT_INTERVAL` requests if that is set.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import weakref
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_counts = {"requests": 0, "connections_opened": 0}
+# Every thread has its own wrapper per database alias, kept until the thread goes away
+_wrappers: "weakref.WeakSet[BaseDatabaseWrapper]" = weakref.WeakSet()
+
+
+def connection_report() -> dict[str, int]:
+    """
+    Return the connection counts of the current worker process:
+
+        {
+            "pid": 4242,
+            "requests": 1000,
+            "connections_opened": 15,  # since the worker started
+            "connections_open": 12,  # right now, at most one per thread and database
+        }
+    """
+    with _lock:
+        wrappers = list(_wrappers)
+        counts = dict(_counts)
+    return {
+        "pid": os.getpid(),
+        **counts,
+        "connections_open": sum(1 for wrapper in wrappers if wrapper.connection is not None),
+    }
+
+
+def log_connection_report() -> None:
+    report = connection_report()
+    # Management commands and other processes that served no request have nothing to report
+    if report["requests"]:
+        logger.info("Database connections: %s", report, extra=report)
+
+
+def on_connection_created(sender, connection: BaseDatabaseWrapper, **kwargs) -> None:
+    with _lock:
+        _counts["connections_opened"] += 1
+        _wrappers.add(connection)
+
+
+def on_request_finished(sender, **kwargs) -> None:
+    with _lock:
+        _counts["requests"] += 1
+        requests = _counts["requests"]
+
+    interval = settings.DB_CONNECTION_REPORT_INTERVAL
+    if interval and requests % interval == 0:
+        log_connection_report()
+
+
+def install() -> None:
+    """Start counting, called once per process by `CoreConfig.ready()`"""
+    connection_created.connect(on_connection_created, dispatch_uid="core.db")
+    request_finished.connect(on_request_finished, dispatch_uid="core.db")
+    atexit.register(log_connection_report)
@@ -0,0 +1,182 @@
+"""
+Custom Django management command to generate responsive variants of static images.
+
+Every image matching `IMAGE_SOURCES` is resized to the widths in `IMAGE_WIDTHS` and saved as
+AVIF, WebP and JPEG (PNG for images with transparency) under `DERIVED_IMAGES_ROOT`, along with
+a manifest that components use to build `srcset` attributes. Images whose content hasn't
+changed since the last run are skipped.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from components.images import IMAGE_FORMATS, IMAGE_SOURCES, IMAGE_WIDTHS, MANIFEST_NAME
+
+
+def variant_widths(width: int) -> list[int]:
+    """Return the widths to generate for a source image, without scaling it up"""
+    widths = [bucket for bucket in IMAGE_WIDTHS if bucket < width]
+    # Images narrower than the largest bucket are also served at their own width
+    return widths if width > IMAGE_WIDTHS[-1] else [*widths, width]
+
+
+def build_variants(
+    source: Path, target_dir: Path, stem: str, format_name: str, widths: list[int]
+) -> list[tuple[int, str]]:
+    """Save one format of a source image at each width, returns the (width, file name) pairs"""
+    from PIL import Image, ImageOps
+
+    extension, _, options = IMAGE_FORMATS[format_name]
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if format_name == "jpeg" or not has_alpha(image):
+            image = image.convert("RGB")
+        else:
+            image = image.convert("RGBA")
+
+        variants = []
+        for width in widths:
+            height = round(image.height * width / image.width)
+            name = f"{stem}.{width}.{extension}"
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            resized.save(target_dir / name, format=format_name.upper(), **options)
+            variants.append((width, name))
+    return variants
+
+
+def has_alpha(image) -> bool:
+    return image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+
+
+class Command(BaseCommand):
+    help = "Generate width-bucketed AVIF, WebP and JPEG variants of static images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths", nargs="*", help="Static paths of the images to build (default: all sources)"
+        )
+        parser.add_argument(
+            "--jobs", type=int, default=os.cpu_count(), help="Number of worker processes"
+        )
+        parser.add_argument(
+            "--force", action="store_true", help="Rebuild images even if they haven't changed"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from PIL import Image
+        except ImportError:
+            raise CommandError(
+                "Pillow is required to build images (requirements-dev.txt)"
+            ) from None
+
+        static_dir = Path(settings.STATICFILES_DIRS[0])
+        derived_dir = Path(settings.DERIVED_IMAGES_ROOT)
+        manifest_file = derived_dir / MANIFEST_NAME
+
+        manifest = {}
+        if manifest_file.exists():
+            manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+
+        paths = options["paths"] or sorted(
+            {
+                path.relative_to(static_dir).as_posix()
+                for pattern in IMAGE_SOURCES
+                for path in static_dir.glob(pattern)
+            }
+        )
+
+        # The settings are part of the hash, so changing a width or quality rebuilds everything
+        settings_key = json.dumps([IMAGE_WIDTHS, IMAGE_FORMATS], sort_keys=True).encode()
+
+        jobs = {}
+        entries = {}
+        with ProcessPoolExecutor(max_workers=options["jobs"]) as executor:
+            for path in paths:
+                source = static_dir / path
+                if not source.is_file():
+                    raise CommandError(f"Image not found: {source}")
+
+                digest = hashlib.sha256(source.read_bytes() + settings_key).hexdigest()[:12]
+                previous = manifest.get(path)
+                if (
+                    not options["force"]
+                    and previous
+                    and previous["hash"] == digest
+                    and self.variants_exist(previous, static_dir)
+                ):
+                    entries[path] = previous
+                    continue
+
+                with Image.open(source) as image:
+                    width, height = image.size
+                    alpha = has_alpha(image)
+                if width < IMAGE_WIDTHS[0]:
+                    continue
+
+                widths = variant_widths(width)
+                target_dir = derived_dir / Path(path).parent
+                stem = f"{Path(path).stem}.{digest}"
+                entries[path] = {
+                    "hash": digest,
+                    "width": widths[-1],
+                    "height": round(height * widths[-1] / width),
+                    "alpha": alpha,
+                    "variants": {},
+                }
+                for format_name in ("avif", "webp", "png" if alpha else "jpeg"):
+                    future = executor.submit(
+                        build_variants, source, target_dir, stem, format_name, widths
+                    )
+                    jobs[future] = (path, format_name, target_dir)
+
+            for future, (path, format_name, target_dir) in jobs.items():
+                entries[path]["variants"][format_name] = [
+                    (width, (target_dir / name).relative_to(static_dir).as_posix())
+                    for width, name in future.result()
+                ]
+
+        built = {path for path, _, _ in jobs.values()}
+        for path in sorted(built):
+            self.stdout.write(f"  built:   {path}")
+        for path in sorted(set(entries) - built):
+            self.stdout.write(f"  skipped: {path} (unchanged)")
+
+        # A full run drops deleted images, then variants no longer in the manifest are removed
+        if not options["paths"]:
+            manifest = {}
+        manifest.update(entries)
+        self.remove_stale_variants(manifest, static_dir, derived_dir)
+
+        derived_dir.mkdir(parents=True, exist_ok=True)
+        manifest_file.write_text(
+            json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Built {len(built)} of {len(entries)} images"))
+
+    def variants_exist(self, entry: dict, static_dir: Path) -> bool:
+        return all(
+            (static_dir / variant).exists()
+            for variants in entry["variants"].values()
+            for _, variant in variants
+        )
+
+    def remove_stale_variants(self, manifest: dict, static_dir: Path, derived_dir: Path) -> None:
+        current = {
+            static_dir / variant
+            for entry in manifest.values()
+            for variants in entry["variants"].values()
+            for _, variant in variants
+        }
+        for path in derived_dir.rglob("*"):
+            if path.is_file() and path.name != MANIFEST_NAME and path not in current:
+                path.unlink()
+                self.stdout.write(f"  removed: {path.relative_to(static_dir)}")
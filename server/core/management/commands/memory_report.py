@@ -0,0 +1,94 @@
+"""
+Custom Django management command to report the memory of a process serving requests.
+
+With `--url`, the URL is requested `--warmup` times, so caches fill and lazy imports happen, then
+`--requests` more times between two snapshots of `core.memory`. The growth between them is
+reported: allocation sites, cache entries and object types that keep growing with the number of
+requests are leaking. Without `--url`, the memory of the process after startup is reported.
+
+The requests go through a `WSGIHandler` as they do under mod_wsgi. The test client isn't used:
+it keeps the contexts of the templates each request renders, which would show up as a leak.
+
+Allocations are traced even when `MEMORY_DIAGNOSTICS` is off, as the command runs outside the
+workers.
+"""
+
+import json
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, RequestFactory
+
+from core.memory import diff_snapshots, report_snapshot, take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Report the memory growth of the process over a number of requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="URL to request, e.g. /demo/")
+        parser.add_argument("--requests", type=int, default=100, help="Requests between snapshots")
+        parser.add_argument(
+            "--warmup", type=int, default=10, help="Requests before the first snapshot"
+        )
+        parser.add_argument(
+            "--user", help="Username of the user the requests are made as (default: anonymous)"
+        )
+        parser.add_argument(
+            "--frames", type=int, default=10, help="Frames per traced allocation (0 = no tracing)"
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=settings.MEMORY_DIAGNOSTICS_TOP,
+            help="Allocation sites and object types to report",
+        )
+
+    def handle(self, *args, **options):
+        if options["frames"] > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(options["frames"])
+        if not options["url"]:
+            self.write(report_snapshot(take_snapshot(), options["top"]))
+            return
+
+        factory = RequestFactory(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        if options["user"]:
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist as e:
+                raise CommandError(f"User '{options['user']}' doesn't exist") from e
+            # Only to create the session, its cookie is sent with the requests
+            client = Client()
+            client.force_login(user)
+            factory.cookies = client.cookies
+
+        handler = WSGIHandler()
+        self.request(handler, factory, options["url"], options["warmup"])
+        before = take_snapshot()
+        self.request(handler, factory, options["url"], options["requests"])
+        after = take_snapshot()
+
+        report = diff_snapshots(before, after, options["top"])
+        report["requests"] = options["requests"]
+        report["rss_bytes_per_request"] = (
+            report["rss_bytes"] // options["requests"] if options["requests"] else 0
+        )
+        self.write(report)
+
+    def request(self, handler: WSGIHandler, factory: RequestFactory, url: str, count: int) -> None:
+        def start_response(status, headers):
+            if int(status.split()[0]) >= 400:
+                raise CommandError(f"GET {url} returned {status}")
+
+        for _ in range(count):
+            response = handler(factory.get(url).environ, start_response)
+            # Consumed and closed like the WSGI server does, streamed responses render meanwhile
+            for _ in response:
+                pass
+            response.close()
+
+    def write(self, report: dict) -> None:
+        self.stdout.write(json.dumps(report, indent=2))
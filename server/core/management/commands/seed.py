@@ -0,0 +1,279 @@
+"""
+Custom Django management command to fill the database and the session store with test data.
+
+Generates users spread over groups and a logged-in session per user, for load and performance
+testing. The same `--seed` always generates the same rows and session keys. The data is written
+in bulk, so millions of rows take minutes:
+
+- every user gets the same password, hashed once instead of running PBKDF2 per user
+- rows are inserted with `bulk_create()` in batches of `--batch-size`; on SQL Server they are sent
+  with pyodbc's `fast_executemany`, a single round trip per batch with the parameters as arrays
+- sessions are written to Redis with one pipelined round trip per batch (`cache.set_many()`)
+
+Seeded users have usernames starting with `--prefix`, `--clear` deletes them first. With
+`--session-keys`, the username and session key of each session are written to a CSV file for
+the load testing tool to log in with the `sessionid` cookie.
+
+The password is `--password`, or a random one that is printed. Seeded users are staff only with
+`--staff`, and the command refuses to run unless `DEBUG` is on or `--force` is given.
+"""
+
+import csv
+import random
+import secrets
+import string
+import time
+from datetime import UTC, datetime, timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Model
+
+FIRST_NAMES = ["Ada", "Alan", "Barbara", "Claude", "Donald", "Edsger", "Frances", "Grace", "John"]
+LAST_NAMES = ["Allen", "Hopper", "Kay", "Knuth", "Liskov", "Lovelace", "Shannon", "Turing"]
+
+# Characters of session keys, as in `django.contrib.sessions.backends.base`
+SESSION_KEY_CHARS = string.ascii_lowercase + string.digits
+
+
+def insert(model: type[Model], objects: list[Model], batch_size: int, using: str) -> None:
+    """Insert rows in batches, with `fast_executemany` on SQL Server"""
+    connection = connections[using]
+    if connection.vendor != "microsoft":
+        model.objects.using(using).bulk_create(objects, batch_size=batch_size)
+        return
+
+    # bulk_create() sends a multi-row INSERT per ~190 rows because of the 2100 parameters limit of
+    # SQL Server, executemany() binds the parameters of a whole batch as arrays
+    opts = model._meta
+    fields = [field for field in opts.concrete_fields if field is not opts.auto_field]
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        connection.ops.quote_name(opts.db_table),
+        ", ".join(connection.ops.quote_name(field.column) for field in fields),
+        ", ".join(["?"] * len(fields)),
+    )
+    # The pyodbc cursor of the connection (in its transaction), as Django's cursor wrappers don't
+    # expose `fast_executemany`. It takes `?` placeholders
+    connection.ensure_connection()
+    cursor = connection.connection.cursor()
+    if not hasattr(cursor, "fast_executemany"):
+        cursor.close()
+        raise CommandError("Seeding SQL Server needs pyodbc 4.0.19 or later (fast_executemany)")
+    cursor.fast_executemany = True
+    try:
+        for start in range(0, len(objects), batch_size):
+            cursor.executemany(
+                sql,
+                [
+                    [
+                        field.get_db_prep_save(getattr(obj, field.attname), connection)
+                        for field in fields
+                    ]
+                    for obj in objects[start : start + batch_size]
+                ],
+            )
+    finally:
+        cursor.close()
+
+
+class Command(BaseCommand):
+    help = "Generate users, group memberships and sessions for load and performance testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="Number of users")
+        parser.add_argument(
+            "--sessions",
+            type=int,
+            help="Number of logged-in sessions, one per user (default: one for every user)",
+        )
+        parser.add_argument("--groups", type=int, default=10, help="Number of groups")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed of the data")
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="Rows or sessions per round trip"
+        )
+        parser.add_argument("--prefix", default="seed", help="Username prefix of seeded users")
+        parser.add_argument(
+            "--password", help="Password of all seeded users (default: a random one, printed)"
+        )
+        parser.add_argument(
+            "--staff",
+            type=float,
+            default=0,
+            help="Fraction of the seeded users that are staff (default: 0)",
+        )
+        parser.add_argument(
+            "--clear", action="store_true", help="Delete the users seeded with --prefix first"
+        )
+        parser.add_argument(
+            "--session-keys", help="CSV file to write the username and session key pairs to"
+        )
+        parser.add_argument(
+            "--database", default=DEFAULT_DB_ALIAS, help="Database to seed (default: default)"
+        )
+        parser.add_argument("--force", action="store_true", help="Seed even though DEBUG is off")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError("DEBUG is off, use --force to seed this database anyway")
+        rng = random.Random(options["seed"])
+        using = options["database"]
+        prefix = options["prefix"]
+        batch_size = options["batch_size"]
+        sessions = options["users"] if options["sessions"] is None else options["sessions"]
+        if sessions > options["users"]:
+            raise CommandError("--sessions can't be more than --users")
+        if not 0 <= options["staff"] <= 1:
+            raise CommandError("--staff is a fraction between 0 and 1")
+        password = options["password"]
+        if password is None:
+            password = secrets.token_urlsafe(16)
+            self.stdout.write(f"Password of the seeded users: {password}")
+
+        if options["clear"]:
+            with self.timed("deleted users") as step:
+                # The total of delete() includes the cascaded group memberships
+                _, deleted = (
+                    User.objects.using(using).filter(username__startswith=f"{prefix}-").delete()
+                )
+                step.rows = deleted.get(User._meta.label, 0)
+        elif User.objects.using(using).filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Users with the prefix '{prefix}' exist, use --clear")
+
+        with self.timed("groups") as step:
+            groups = [
+                Group.objects.using(using).get_or_create(name=f"{prefix}-group-{i}")[0]
+                for i in range(options["groups"])
+            ]
+            step.rows = len(groups)
+
+        with self.timed("users") as step, transaction.atomic(using=using):
+            users = self.generate_users(rng, options["users"], prefix, password, options["staff"])
+            insert(User, users, batch_size, using)
+            step.rows = len(users)
+
+        # Backends without RETURNING don't set the keys of bulk inserted rows
+        ids = dict(
+            User.objects.using(using)
+            .filter(username__startswith=f"{prefix}-")
+            .values_list("username", "id")
+        )
+        for user in users:
+            user.id = ids[user.username]
+
+        with self.timed("group memberships") as step, transaction.atomic(using=using):
+            memberships = [
+                User.groups.through(user_id=user.id, group_id=group.id)
+                for user in users
+                for group in rng.sample(groups, rng.randint(0, min(2, len(groups))))
+            ]
+            insert(User.groups.through, memberships, batch_size, using)
+            step.rows = len(memberships)
+
+        with self.timed("sessions") as step:
+            keys = self.create_sessions(rng, users[:sessions], batch_size, using)
+            step.rows = len(keys)
+
+        if options["session_keys"]:
+            with open(options["session_keys"], "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(["username", "session_key"])
+                writer.writerows(keys)
+            self.stdout.write(f"Session keys written to {options['session_keys']}")
+
+    def generate_users(
+        self, rng: random.Random, count: int, prefix: str, password: str, staff: float
+    ):
+        # Salted once: all seeded users share the hash, so they all log in with the password. The
+        # salt comes from the seed, so the same seed gives the same hashes and session hashes
+        salt = "".join(rng.choices(string.ascii_letters + string.digits, k=22))
+        password_hash = make_password(password, salt)
+        joined = datetime(2024, 1, 1, tzinfo=UTC)
+        users = []
+        for i in range(count):
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            username = f"{prefix}-{i:07d}"
+            users.append(
+                User(
+                    username=username,
+                    email=f"{username}@example.com",
+                    password=password_hash,
+                    first_name=first_name,
+                    last_name=last_name,
+                    is_staff=rng.random() < staff,
+                    date_joined=joined + timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+                )
+            )
+        return users
+
+    def create_sessions(
+        self, rng: random.Random, users: list[User], batch_size: int, using: str
+    ) -> list[tuple[str, str]]:
+        """Store a logged-in session per user, returns the (username, session key) pairs"""
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        timeout = settings.SESSION_COOKIE_AGE
+        backend = settings.AUTHENTICATION_BACKENDS[0]
+        # Users sharing a password hash share the session hash too
+        session_hash = users[0].get_session_auth_hash() if users else ""
+
+        keys = []
+        for start in range(0, len(users), batch_size):
+            batch = {}
+            for user in users[start : start + batch_size]:
+                key = "".join(rng.choices(SESSION_KEY_CHARS, k=32))
+                batch[key] = {
+                    SESSION_KEY: str(user.id),
+                    BACKEND_SESSION_KEY: backend,
+                    HASH_SESSION_KEY: session_hash,
+                }
+                keys.append((user.username, key))
+
+            if issubclass(store, DatabaseSessionStore):
+                expire_date = datetime.now(UTC) + timedelta(seconds=timeout)
+                encode = store().encode
+                rows = [
+                    Session(session_key=key, session_data=encode(data), expire_date=expire_date)
+                    for key, data in batch.items()
+                ]
+                insert(Session, rows, batch_size, using)
+            if hasattr(store, "cache_key_prefix"):
+                # A single pipelined round trip with django-redis
+                cache = caches[settings.SESSION_CACHE_ALIAS]
+                cache.set_many(
+                    {store.cache_key_prefix + key: data for key, data in batch.items()}, timeout
+                )
+        return keys
+
+    def timed(self, label: str):
+        return Step(self, label)
+
+
+class Step:
+    """Times a step of the command and reports its rows per second"""
+
+    def __init__(self, command: BaseCommand, label: str):
+        self.command = command
+        self.label = label
+        self.rows = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            return
+        elapsed = time.perf_counter() - self.start
+        rate = self.rows / elapsed if elapsed else 0
+        self.command.stdout.write(
+            self.command.style.SUCCESS(
+                f"{self.label}: {self.rows} rows in {elapsed:.2f} s ({rate:,.0f} rows/s)"
+            )
+        )
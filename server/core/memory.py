@@ -0,0 +1,205 @@
+"""
+Memory diagnostics of the worker processes, enabled by `MEMORY_DIAGNOSTICS`.
+
+A snapshot holds the resident set size of the process, the allocations traced by `tracemalloc`
+(started at startup with `MEMORY_DIAGNOSTICS_FRAMES` frames per traceback), the entries of the
+template and component caches and the number of live objects by type. `diff_snapshots()`
+compares two snapshots, so the growth of a process between them can be attributed to the code
+that allocated it, to templates or components that were added to a cache, or to a type of
+object that piles up.
+
+`memory_view` (staff only, at `/diagnostics/memory/`) reports the worker process that serves
+the request and its growth since its baseline, `?baseline=1` takes a new baseline. With several
+worker processes each has its own baseline, the reports carry the pid. `manage.py memory_report`
+runs requests in its own process and reports the growth, to look for leaks outside production.
+
+When `MEMORY_DIAGNOSTICS` is off, `tracemalloc` isn't started and the URL isn't routed.
+"""
+
+import gc
+import os
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpRequest, JsonResponse
+from django.template import engines
+
+import django_components.cache
+import django_components.template
+from django_components import registry
+
+from components.images import find_static_file
+
+from .queries import normalize_sql
+
+# Keys of new cache entries listed per cache in a diff
+NEW_CACHE_KEYS = 20
+
+
+@dataclass
+class Snapshot:
+    pid: int
+    taken: float
+    rss: int
+    traces: tracemalloc.Snapshot | None
+    caches: dict[str, list[str]]
+    cache_sizes: dict[str, int]
+    objects: Counter[str]
+
+
+def install() -> None:
+    """Start tracing allocations, called at startup when `MEMORY_DIAGNOSTICS` is on"""
+    if settings.MEMORY_DIAGNOSTICS_FRAMES > 0 and not tracemalloc.is_tracing():
+        tracemalloc.start(settings.MEMORY_DIAGNOSTICS_FRAMES)
+
+
+def rss() -> int:
+    """Return the resident set size of the process in bytes"""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        try:
+            import resource
+        except ImportError:
+            # Windows has neither
+            return 0
+        # Peak size in kilobytes on Linux, in bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def cache_keys() -> dict[str, list[str]]:
+    """Return the keys of the template and component caches that can grow while serving"""
+    caches = {}
+    for backend in engines.all():
+        # Cached loaders of the Django template backends
+        for loader in getattr(getattr(backend, "engine", None), "template_loaders", ()):
+            if hasattr(loader, "get_template_cache"):
+                caches[f"templates.{backend.name}"] = [
+                    str(key) for key in loader.get_template_cache
+                ]
+
+    template_cache = django_components.cache.template_cache
+    if template_cache is not None:
+        caches["components.templates"] = [str(key) for key in template_cache.cache]
+    caches["components.template_files"] = list(
+        django_components.template.component_template_file_cache
+    )
+    caches["components.registered"] = list(registry.all())
+    return caches
+
+
+def cache_sizes() -> dict[str, int]:
+    """Return the sizes of caches whose keys aren't worth listing"""
+    sizes = {
+        "queries.normalize_sql": normalize_sql.cache_info().currsize,
+        "images.find_static_file": find_static_file.cache_info().currsize,
+    }
+    media_cache = django_components.cache.component_media_cache
+    if media_cache is not None:
+        sizes["components.media"] = len(getattr(media_cache, "_cache", ()))
+    return sizes
+
+
+def object_counts() -> Counter[str]:
+    """Return the number of objects tracked by the garbage collector by type"""
+    counts: Counter[str] = Counter()
+    for obj in gc.get_objects():
+        cls = type(obj)
+        counts[f"{cls.__module__}.{cls.__qualname__}"] += 1
+    return counts
+
+
+def take_snapshot() -> Snapshot:
+    gc.collect()
+    # Counted first, the traces of a snapshot are millions of tuples
+    objects = object_counts()
+    traces = None
+    if tracemalloc.is_tracing():
+        traces = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        )
+    return Snapshot(
+        pid=os.getpid(),
+        taken=time.time(),
+        rss=rss(),
+        traces=traces,
+        caches=cache_keys(),
+        cache_sizes=cache_sizes(),
+        objects=objects,
+    )
+
+
+def report_snapshot(snapshot: Snapshot, top: int) -> dict:
+    report = {
+        "pid": snapshot.pid,
+        "rss_bytes": snapshot.rss,
+        "caches": {
+            **{name: len(keys) for name, keys in snapshot.caches.items()},
+            **snapshot.cache_sizes,
+        },
+        "objects": dict(snapshot.objects.most_common(top)),
+        "allocations": None,
+    }
+    if snapshot.traces is not None:
+        report["allocations"] = [
+            {"site": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+            for stat in snapshot.traces.statistics("lineno")[:top]
+        ]
+    return report
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot, top: int) -> dict:
+    """Return what grew between two snapshots of the same process"""
+    objects = Counter(new.objects)
+    objects.subtract(old.objects)
+    caches = {}
+    for name, keys in new.caches.items():
+        previous = set(old.caches.get(name, ()))
+        added = [key for key in keys if key not in previous]
+        caches[name] = {
+            "size": len(keys) - len(previous),
+            "new": added[:NEW_CACHE_KEYS],
+        }
+    for name, size in new.cache_sizes.items():
+        caches[name] = {"size": size - old.cache_sizes.get(name, 0)}
+
+    report = {
+        "seconds": round(new.taken - old.taken, 1),
+        "rss_bytes": new.rss - old.rss,
+        "caches": {name: change for name, change in caches.items() if change["size"]},
+        "objects": {name: count for name, count in objects.most_common(top) if count > 0},
+        "allocations": None,
+    }
+    if old.traces is not None and new.traces is not None:
+        report["allocations"] = [
+            {"site": str(stat.traceback), "bytes": stat.size_diff, "count": stat.count_diff}
+            for stat in new.traces.compare_to(old.traces, "lineno")[:top]
+            if stat.size_diff
+        ]
+    return report
+
+
+# Baseline of this worker process for `memory_view`
+_baseline: Snapshot | None = None
+
+
+@staff_member_required
+def memory_view(request: HttpRequest) -> JsonResponse:
+    """Report the memory of the worker process serving the request, see the module docstring"""
+    global _baseline
+    top = settings.MEMORY_DIAGNOSTICS_TOP
+    snapshot = take_snapshot()
+    report = report_snapshot(snapshot, top)
+    if _baseline is not None:
+        report["growth"] = diff_snapshots(_baseline, snapshot, top)
+    if _baseline is None or request.GET.get("baseline"):
+        _baseline = snapshot
+        report["baseline"] = True
+    response = JsonResponse(report, json_dumps_params={"indent": 2})
+    response["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,223 @@
+"""
+Prometheus metrics of the application, served at `METRICS_PATH` (`/metrics`).
+
+- `django_http_request_duration_seconds`: request latency histogram per URL name (URLs of a
+  namespace such as the admin are grouped under the namespace) and method
+- `django_http_responses_total`: responses per URL name and status code
+- `django_component_render_duration_seconds`: render count and duration per registered
+  component, including the components rendered inside it
+- `django_cache_gets_total`: cache lookups per cache alias and result (hit or miss)
+- `django_db_queries_total`: SQL queries per database alias and URL name
+- `django_http_requests_shed_total`: requests turned away by `core.admission` per reason
+
+`MetricsMiddleware` comes first in `MIDDLEWARE`: it times every request and answers the metrics
+URL itself, so scrapes never run the session, auth or any other middleware.
+
+With several worker processes (mod_wsgi daemons), set `PROMETHEUS_MULTIPROC_DIR` to an empty
+directory shared by the workers: each process then writes its values to memory-mapped files
+there, and a scrape served by any worker adds up the files of all of them. The directory has to
+be emptied before the server starts, see `infra/prod.Dockerfile`. A worker that exits (mod_wsgi
+recycles them after `maximum-requests`) marks itself dead: its live gauge files are removed, its
+counter and histogram files are kept since their counts are part of the totals, so there are
+more files to read with every recycled worker until the server restarts.
+"""
+
+import atexit
+import ipaddress
+import os
+import time
+from collections import Counter as CallCounter
+from collections.abc import Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse, HttpResponseBase, HttpResponseForbidden
+
+from django_components import (
+    ComponentExtension,
+    ExtensionComponentConfig,
+    OnComponentInputContext,
+    OnComponentRegisteredContext,
+    OnComponentRenderedContext,
+)
+from django_redis.cache import RedisCache
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from .queries import record_queries
+from .streaming import call_on_complete
+
+REQUEST_LATENCY = Histogram(
+    "django_http_request_duration_seconds",
+    "Time to generate the response of a request, including streamed bodies",
+    ["view", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RESPONSES = Counter(
+    "django_http_responses_total", "Responses by URL name and status code", ["view", "status"]
+)
+COMPONENT_RENDERS = Histogram(
+    "django_component_render_duration_seconds",
+    "Time to render a component, including its nested components",
+    ["component"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+CACHE_GETS = Counter(
+    "django_cache_gets_total", "Cache lookups by cache alias and result", ["alias", "result"]
+)
+DB_QUERIES = Counter(
+    "django_db_queries_total", "SQL queries by database alias and URL name", ["alias", "view"]
+)
+SHED_REQUESTS = Counter(
+    "django_http_requests_shed_total",
+    "Requests turned away by admission control, by reason",
+    ["reason"],
+)
+
+# Label of requests that didn't resolve to a view (404s)
+UNRESOLVED_VIEW = "unresolved"
+
+_MISSING = object()
+
+
+def view_label(request: HttpRequest) -> str:
+    """Return the URL name of a request, or the namespace of namespaced URLs (e.g. "admin")"""
+    match = request.resolver_match
+    if match is None:
+        return UNRESOLVED_VIEW
+    if match.namespaces:
+        return match.namespaces[0]
+    return match.url_name or match.view_name
+
+
+def metrics_registry() -> CollectorRegistry:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def mark_process_dead() -> None:
+    multiprocess.mark_process_dead(os.getpid())
+
+
+def install() -> None:
+    """Mark the process dead when it exits, called at startup"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        atexit.register(mark_process_dead)
+
+
+def is_metrics_client(request: HttpRequest) -> bool:
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network) for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Render the metrics of all worker processes in the Prometheus text format"""
+    if not is_metrics_client(request):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    """Records request metrics and serves the metrics URL ahead of the other middleware"""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponseBase]):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        if request.path == settings.METRICS_PATH:
+            return metrics_view(request)
+
+        start = time.perf_counter()
+        stats, stop = record_queries(request)
+
+        def finish(status: int):
+            stop()
+            view = view_label(request)
+            REQUEST_LATENCY.labels(view, request.method).observe(time.perf_counter() - start)
+            RESPONSES.labels(view, status).inc()
+            for alias, count in CallCounter(alias for alias, _, _ in stats.queries).items():
+                DB_QUERIES.labels(alias, view).inc(count)
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            finish(500)
+            raise
+
+        call_on_complete(response, lambda: finish(response.status_code))
+        return response
+
+
+class MetricsExtension(ComponentExtension):
+    """Times the renders of registered components, enabled in `COMPONENTS["extensions"]`"""
+
+    name = "metrics"
+
+    class ComponentConfig(ExtensionComponentConfig):
+        """State of a component instance, available as `component.metrics`"""
+
+        # Kept on the instance, so a render that raises before `on_component_rendered` leaves
+        # nothing behind
+        start: float | None = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.names: dict[type, str] = {}
+
+    def on_component_registered(self, ctx: OnComponentRegisteredContext) -> None:
+        self.names[ctx.component_cls] = ctx.name
+
+    def on_component_input(self, ctx: OnComponentInputContext) -> None:
+        ctx.component.metrics.start = time.perf_counter()
+
+    def on_component_rendered(self, ctx: OnComponentRenderedContext) -> None:
+        start = ctx.component.metrics.start
+        name = self.names.get(ctx.component_cls)
+        if start is not None and name:
+            COMPONENT_RENDERS.labels(name).observe(time.perf_counter() - start)
+
+
+class MetricsRedisCache(RedisCache):
+    """`django_redis` cache backend that counts hits and misses"""
+
+    def count(self, hits: int, misses: int) -> None:
+        alias = getattr(self, "_metrics_alias", None)
+        if alias is None:
+            # Backends aren't told their alias, but `caches` returns this same instance for it
+            alias = next((name for name in settings.CACHES if caches[name] is self), "")
+            self._metrics_alias = alias
+        if hits:
+            CACHE_GETS.labels(alias, "hit").inc(hits)
+        if misses:
+            CACHE_GETS.labels(alias, "miss").inc(misses)
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, _MISSING, version=version, client=client)
+        if value is _MISSING:
+            self.count(0, 1)
+            return default
+        self.count(1, 0)
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        values = super().get_many(keys, version=version, client=client)
+        self.count(len(values), len(keys) - len(values))
+        return values
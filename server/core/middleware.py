@@ -0,0 +1,38 @@
+"""
+Middleware working around issues of third-party packages.
+
+`ReleaseComponentContextMiddleware` fixes a leak of every request a worker served:
+django-components caches the context processors data of a request in a `WeakKeyDictionary`
+keyed by the request, but the data holds the request (`request`, and `user`, `messages`... that
+reference it), so the entry is never freed. Found with the memory report of `core.memory`.
+
+django-components has no public API for that cache, so the middleware depends on the
+django-components version pinned in pyproject.toml (`core.tests.test_middleware` fails if an
+upgrade changes it) and can be turned off with `COMPONENTS_RELEASE_CONTEXT`.
+"""
+
+from collections.abc import Callable
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponseBase
+
+from django_components.util.context import context_processors_data
+
+from .streaming import call_on_complete
+
+
+class ReleaseComponentContextMiddleware:
+    """Drops the context processors data django-components cached for a request"""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponseBase]):
+        if not settings.COMPONENTS_RELEASE_CONTEXT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        response = self.get_response(request)
+        # Once the server has sent the response: streamed responses render their components
+        # while they're sent
+        call_on_complete(response, lambda: context_processors_data.pop(request, None))
+        return response
@@ -0,0 +1,187 @@
+"""
+Preload hints for the assets every page of a layout needs before it can render.
+
+The critical assets of a layout are the stylesheets and scripts in its `<head>`, plus the body
+text fonts of those stylesheets, which the browser would otherwise only discover after the CSS
+has been downloaded and parsed. They are sent as `Link: rel=preload` headers:
+
+- `PreloadMiddleware` adds the header to the response of views marked with `@preload_assets`
+- `EarlyHintsMiddleware` wraps the ASGI application and sends the same links as a
+  `103 Early Hints` response, before the view runs, on servers that support it
+
+URLs come from `static()`, so they use the fingerprinted names of the static manifest when
+`ManifestStaticFilesStorage` is configured.
+"""
+
+import functools
+import posixpath
+import re
+from collections.abc import Callable
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.http import HttpRequest, HttpResponseBase
+from django.template import loader
+from django.templatetags.static import static
+from django.urls import Resolver404, resolve
+
+# `<link rel="stylesheet">` and `<script>` tags that load a `{% static %}` file
+HEAD_ASSET_REGEX = re.compile(
+    r"""<(?P<tag>link|script)\b(?P<attrs>[^>]*?)"""
+    r"""(?:href|src)=["']\{%\s*static\s+["'](?P<path>[^"']+)["']\s*%\}["'][^>]*>""",
+    re.IGNORECASE,
+)
+
+FONT_FACE_REGEX = re.compile(r"@font-face\s*\{(?P<body>[^}]*)\}")
+FONT_URL_REGEX = re.compile(r"""url\(\s*["']?(?P<url>[^"')]+\.woff2)["']?\s*\)""")
+ROOT_FONT_FAMILY_REGEX = re.compile(
+    r"(?:^|[},])\s*html\s*\{[^}]*?font-family:\s*(?P<family>[^;}]+)"
+)
+
+# Weights of the body text font that are used above the fold on most pages (regular and bold)
+CRITICAL_FONT_WEIGHTS = ("400", "700")
+
+
+def css_property(declarations: str, name: str) -> str:
+    match = re.search(rf"(?:^|;)\s*{name}\s*:\s*([^;]+)", declarations)
+    return match.group(1).strip().strip("\"'") if match else ""
+
+
+def critical_fonts(stylesheet: str) -> list[str]:
+    """Return the static paths of the body text fonts declared in a stylesheet"""
+    path = finders.find(stylesheet)
+    if not path:
+        return []
+    with open(path, encoding="utf-8") as file:
+        css = file.read()
+
+    match = ROOT_FONT_FAMILY_REGEX.search(css)
+    if not match:
+        return []
+    family = match.group("family").split(",")[0].strip().strip("\"'")
+
+    fonts = []
+    for face in FONT_FACE_REGEX.finditer(css):
+        declarations = face.group("body")
+        if (
+            css_property(declarations, "font-family") != family
+            or css_property(declarations, "font-style") not in ("", "normal")
+            or css_property(declarations, "font-weight") not in CRITICAL_FONT_WEIGHTS
+        ):
+            continue
+        url = FONT_URL_REGEX.search(declarations)
+        if url:
+            font = posixpath.join(posixpath.dirname(stylesheet), url["url"])
+            fonts.append(posixpath.normpath(font))
+    return fonts
+
+
+@functools.cache
+def critical_assets(layout: str) -> list[tuple[str, str]]:
+    """Return the (static path, destination) of every asset the layout needs to render"""
+    source = loader.get_template(layout).template.source
+    head = source.split("</head>", 1)[0]
+
+    assets = []
+    for match in HEAD_ASSET_REGEX.finditer(head):
+        if match["tag"].lower() == "script":
+            assets.append((match["path"], "script"))
+        elif re.search(r"""rel=["']stylesheet["']""", match["attrs"], re.IGNORECASE):
+            assets.append((match["path"], "style"))
+            assets.extend((font, "font") for font in critical_fonts(match["path"]))
+    return assets
+
+
+@functools.cache
+def preload_links(layout: str) -> list[str]:
+    """Return the `Link` header values that preload the critical assets of a layout"""
+    links = []
+
+    # Assets served from another origin (e.g. a CDN) need the connection opened early as well
+    static_url = urlsplit(settings.STATIC_URL)
+    if static_url.netloc:
+        links.append(f"<{static_url.scheme or 'https'}://{static_url.netloc}>; rel=preconnect")
+
+    for path, destination in critical_assets(layout):
+        link = f"<{static(path)}>; rel=preload; as={destination}"
+        if destination == "font":
+            # Fonts are always fetched in CORS mode, so the preload has to be too
+            link += '; type="font/woff2"; crossorigin'
+        links.append(link)
+    return links
+
+
+def preload_assets(layout: str = "layout.html") -> Callable:
+    """
+    Mark a view as rendering a page of the given layout, so its critical assets are preloaded.
+
+    Usage:
+
+        @preload_assets("layout.html")
+        def home(request):
+            ...
+    """
+
+    def decorator(view: Callable) -> Callable:
+        view.preload_layout = layout
+        return view
+
+    return decorator
+
+
+class PreloadMiddleware:
+    """Adds `Link: rel=preload` headers to successful HTML responses of `@preload_assets` views"""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponseBase]):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        response = self.get_response(request)
+
+        layout = getattr(request, "preload_layout", None)
+        if (
+            settings.PRELOAD_ASSETS
+            and layout
+            and response.status_code == 200
+            and response.get("Content-Type", "").startswith("text/html")
+            and "Link" not in response
+        ):
+            response["Link"] = ", ".join(preload_links(layout))
+        return response
+
+    def process_view(self, request: HttpRequest, view_func: Callable, view_args, view_kwargs):
+        request.preload_layout = getattr(view_func, "preload_layout", None)
+
+
+class EarlyHintsMiddleware:
+    """
+    ASGI middleware that sends a `103 Early Hints` response for `@preload_assets` views.
+
+    The hints go out before Django handles the request, so the browser can fetch the assets
+    while the view runs. Only servers that advertise the `http.response.early_hint` ASGI
+    extension (e.g. Hypercorn) can send them; everything else is passed through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] == "http"
+            and scope["method"] in ("GET", "HEAD")
+            and "http.response.early_hint" in (scope.get("extensions") or {})
+            and settings.PRELOAD_ASSETS
+        ):
+            links = self.get_links(scope)
+            if links:
+                await send({"type": "http.response.early_hint", "links": links})
+        await self.app(scope, receive, send)
+
+    def get_links(self, scope) -> list[bytes]:
+        path = scope["path"].removeprefix(scope.get("root_path", "")) or "/"
+        try:
+            layout = getattr(resolve(path).func, "preload_layout", None)
+        except Resolver404:
+            return []
+        return [link.encode() for link in preload_links(layout)] if layout else []
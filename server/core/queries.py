@@ -0,0 +1,172 @@
+"""
+Per-request SQL instrumentation.
+
+`QueryInstrumentationMiddleware` installs an execute wrapper on every database connection for a
+sample of requests (`SQL_INSTRUMENTATION_SAMPLE_RATE`) and, once the response is complete:
+
+- adds the query count and total database time to the `Server-Timing` header
+- logs queries slower than `SQL_SLOW_QUERY_MS`
+- logs query shapes (the SQL with literals and `IN` lists normalized) that ran at least
+  `SQL_N_PLUS_ONE_THRESHOLD` times, which usually means a loop is querying related rows one by
+  one instead of using `select_related()` / `prefetch_related()`
+
+Records go to the `core.queries` logger, formatted as JSON with the view name, the normalized
+SQL and the durations as fields. The stats of a request are available as `request.query_stats`.
+
+`record_queries()` installs a single execute wrapper per request, shared with `MetricsMiddleware`
+that counts the queries of every request.
+"""
+
+import functools
+import logging
+import random
+import re
+import time
+from collections import Counter
+from collections.abc import Callable
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponseBase
+
+from .streaming import call_on_complete
+
+logger = logging.getLogger(__name__)
+
+STRING_LITERAL_REGEX = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL_REGEX = re.compile(r"\b\d+(?:\.\d+)?\b")
+IN_LIST_REGEX = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?|\.\.\.)\s*,?)+\)", re.IGNORECASE)
+WHITESPACE_REGEX = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Return the shape of a query, which is the same for every parameter value"""
+    sql = STRING_LITERAL_REGEX.sub("?", sql)
+    sql = NUMBER_LITERAL_REGEX.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = IN_LIST_REGEX.sub("IN (...)", sql)
+    return WHITESPACE_REGEX.sub(" ", sql).strip()
+
+
+class QueryStats:
+    """Execute wrapper that records the SQL and duration of every query of a request"""
+
+    def __init__(self):
+        self.queries: list[tuple[str, str, float]] = []
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.duration += duration
+            self.queries.append((context["connection"].alias, sql, duration))
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int, float]]:
+        """Return the (normalized SQL, count, total seconds) of shapes run `threshold` times"""
+        counts: Counter[str] = Counter()
+        durations: Counter[str] = Counter()
+        for _, sql, duration in self.queries:
+            shape = normalize_sql(sql)
+            counts[shape] += 1
+            durations[shape] += duration
+        return [
+            (shape, count, durations[shape])
+            for shape, count in counts.items()
+            if count >= threshold
+        ]
+
+    def slow_queries(self, threshold: float) -> list[tuple[str, str, float]]:
+        """Return the (alias, normalized SQL, seconds) of queries that took `threshold` seconds"""
+        return [
+            (alias, normalize_sql(sql), duration)
+            for alias, sql, duration in self.queries
+            if duration >= threshold
+        ]
+
+
+def record_queries(request: HttpRequest) -> tuple[QueryStats, Callable[[], None]]:
+    """
+    Record the queries of a request on every database connection, with one execute wrapper
+    shared by the middleware that need them.
+
+    Returns the stats of the request and a function to call once the response is complete,
+    which removes the wrapper if this call installed it.
+    """
+    stats = getattr(request, "query_stats", None)
+    if stats is not None:
+        return stats, lambda: None
+
+    stats = request.query_stats = QueryStats()
+    wrapped = connections.all()
+    for connection in wrapped:
+        connection.execute_wrappers.append(stats)
+
+    def stop():
+        for connection in wrapped:
+            connection.execute_wrappers.remove(stats)
+
+    return stats, stop
+
+
+class QueryInstrumentationMiddleware:
+    """Counts and times the SQL queries of a sample of requests"""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponseBase]):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        rate = settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        stats, stop = record_queries(request)
+
+        def finish():
+            stop()
+            self.report(request, stats)
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            finish()
+            raise
+
+        # The body of a streamed response renders after the headers were sent
+        call_on_complete(response, finish)
+        if not response.streaming:
+            timing = f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+            if "Server-Timing" in response:
+                timing = f"{response['Server-Timing']}, {timing}"
+            response["Server-Timing"] = timing
+        return response
+
+    def report(self, request: HttpRequest, stats: QueryStats) -> None:
+        match = request.resolver_match
+        view = match.view_name if match else request.path
+        fields = {"view": view, "queries": stats.count, "duration_ms": stats.duration * 1000}
+        logger.info(
+            "%d queries in %.1f ms for %s", stats.count, stats.duration * 1000, view, extra=fields
+        )
+
+        for alias, sql, duration in stats.slow_queries(settings.SQL_SLOW_QUERY_MS / 1000):
+            logger.warning(
+                "Slow query in %s",
+                view,
+                extra={"view": view, "alias": alias, "sql": sql, "duration_ms": duration * 1000},
+            )
+
+        for sql, count, duration in stats.repeated_shapes(settings.SQL_N_PLUS_ONE_THRESHOLD):
+            logger.warning(
+                "Probable N+1 query in %s, ran %d times",
+                view,
+                count,
+                extra={"view": view, "sql": sql, "count": count, "duration_ms": duration * 1000},
+            )
@@ -0,0 +1,166 @@
+"""
+Database router that sends reads to the read replicas in `DATABASE_REPLICAS`.
+
+Writes always go to `default`, the primary. Reads go to a random healthy replica, except:
+
+- reads in a transaction on the primary (`transaction.atomic()`) go to the primary, so they see
+  its uncommitted writes, and so do `select_for_update()` querysets, which Django routes as
+  writes
+- after a request wrote, the rest of the request, including the body of a streamed response,
+  reads from the primary, and so do the requests of the same client for
+  `DB_REPLICA_READ_AFTER_WRITE` seconds (`ReplicaPinningMiddleware` keeps the time in a
+  cookie), so users see their own changes despite the replication lag
+- a replica that can't be reached, or lags behind the primary by more than
+  `DB_REPLICA_MAX_LAG` seconds, is skipped until its next check `DB_REPLICA_CHECK_INTERVAL`
+  seconds later; with no healthy replica, reads go to the primary
+"""
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+from django.http import HttpRequest, HttpResponseBase
+
+from .streaming import call_on_complete
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "default"
+
+# Cookie holding the time (seconds since the epoch) until which a client reads from the primary
+PRIMARY_COOKIE = "db_primary_until"
+
+# Replication lag of the local database of an Availability Group secondary
+SQL_SERVER_LAG_QUERY = """
+SELECT MAX(secondary_lag_seconds)
+FROM sys.dm_hadr_database_replica_states
+WHERE is_local = 1 AND database_id = DB_ID()
+"""
+
+# Set while the current request (or code outside of requests) has to read from the primary
+_use_primary: contextvars.ContextVar[bool] = contextvars.ContextVar("use_primary", default=False)
+# Set when the current request wrote, so the client is pinned to the primary for a while
+_wrote: contextvars.ContextVar[bool] = contextvars.ContextVar("wrote", default=False)
+
+
+class ReplicaHealth:
+    """Per-process cache of which replicas are reachable and caught up with the primary"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # alias: (healthy, time of the check)
+        self.checks: dict[str, tuple[bool, float]] = {}
+
+    def healthy(self) -> list[str]:
+        now = time.monotonic()
+        return [alias for alias in settings.DATABASE_REPLICAS if self.is_healthy(alias, now)]
+
+    def is_healthy(self, alias: str, now: float) -> bool:
+        healthy, checked = self.checks.get(alias, (False, float("-inf")))
+        if now - checked < settings.DB_REPLICA_CHECK_INTERVAL:
+            return healthy
+        # One thread checks while the others keep using the last result
+        if not self.lock.acquire(blocking=False):
+            return healthy
+        try:
+            healthy = self.check(alias)
+            self.checks[alias] = (healthy, now)
+        finally:
+            self.lock.release()
+        return healthy
+
+    def check(self, alias: str) -> bool:
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                if connection.vendor == "microsoft":
+                    cursor.execute(SQL_SERVER_LAG_QUERY)
+                    lag = cursor.fetchone()[0] or 0
+                else:
+                    cursor.execute("SELECT 1")
+                    lag = 0
+        except DatabaseError as error:
+            logger.warning("Database replica %s is unavailable: %s", alias, error)
+            connection.close()
+            return False
+
+        if lag > settings.DB_REPLICA_MAX_LAG:
+            logger.warning("Database replica %s is %s seconds behind the primary", alias, lag)
+            return False
+        return True
+
+
+replica_health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    """Sends writes to the primary and reads to a healthy replica, enabled by `DB_REPLICA_HOSTS`"""
+
+    def db_for_read(self, model, **hints) -> str:
+        if _use_primary.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        replicas = replica_health.healthy()
+        return random.choice(replicas) if replicas else PRIMARY
+
+    def db_for_write(self, model, **hints) -> str:
+        _use_primary.set(True)
+        _wrote.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool | None:
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> bool | None:
+        # Replicas get the schema from the primary
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaPinningMiddleware:
+    """Keeps clients that just wrote reading from the primary, see `ReplicaRouter`"""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponseBase]):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        try:
+            pinned = float(request.COOKIES.get(PRIMARY_COOKIE, 0)) > time.time()
+        except ValueError:
+            pinned = False
+        previous = _use_primary.get(), _wrote.get()
+        _use_primary.set(pinned)
+        _wrote.set(False)
+
+        def finish():
+            # Set rather than reset, a streamed body may finish in another context (ASGI)
+            _use_primary.set(previous[0])
+            _wrote.set(previous[1])
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            finish()
+            raise
+        if _wrote.get():
+            window = settings.DB_REPLICA_READ_AFTER_WRITE
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                str(time.time() + window),
+                max_age=window,
+                httponly=True,
+                samesite="Lax",
+                secure=request.is_secure(),
+            )
+        # A streamed body reads from the database while it's sent, after this returned
+        call_on_complete(response, finish)
+        return response
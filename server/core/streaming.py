@@ -0,0 +1,296 @@
+"""
+Streaming template responses that flush the page head before the body is rendered.
+
+`stream_render()` is a drop-in replacement for `django.shortcuts.render()` for views whose
+template extends `layout.html`. Everything before `{% block content %}` (the `<head>` with the
+stylesheet and scripts, the banner and the header) is sent as the first chunk, so the browser
+can start fetching assets while the rest of the page renders. The content block is then sent
+as components finish rendering, in chunks of at least `STREAM_CHUNK_SIZE` characters so that
+`mod_deflate` is not forced to emit many tiny compressed blocks.
+
+Headers and cookies are sent before the template renders, so anything that changes them has to
+happen in the view. `stream_render()` sets up the CSRF cookie up front for `{% csrf_token %}`.
+The messages storage is updated from the response before a streamed body would show them, so
+requests with pending messages are rendered with `render()`.
+
+The part before the first flush renders in the view, so an error there gets the regular error
+response. An error in the content block, once the 200 status line is out, is reported through
+the `django.request` logger like an error response, and the stream ends with an error notice
+before the connection is aborted, so the client and any cache see the response is incomplete.
+"""
+
+import logging
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpRequest, HttpResponseBase, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.template import Context, NodeList, loader
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.loader_tags import BLOCK_CONTEXT_KEY, BlockContext, BlockNode, ExtendsNode
+
+from asgiref.sync import sync_to_async
+from django_components import registry
+from django_components.component import ComponentNode
+from django_components.dependencies import (
+    insert_component_dependencies_comment,
+    render_dependencies,
+)
+
+from django_project.template_loaders import RENDERED_COMMENT_REGEX
+
+request_logger = logging.getLogger("django.request")
+
+# Blocks that are flushed up to before they start rendering
+FLUSH_BEFORE_BLOCKS = ("content",)
+
+# Minimum size of the chunks flushed while the content block renders
+STREAM_CHUNK_SIZE = 4096
+
+# Ends a stream that failed after its first chunk was sent
+STREAM_ERROR_HTML = (
+    '<div class="usa-alert usa-alert--error" role="alert"><div class="usa-alert__body">'
+    '<p class="usa-alert__text">This page could not be loaded completely. Please reload it.</p>'
+    "</div></div>"
+)
+
+
+class _ChunkBuffer:
+    """Collects rendered output and hands it out in flushable chunks"""
+
+    def __init__(self, head_css: str = ""):
+        self.parts: list[str] = []
+        self.size = 0
+        # Component markers are collected so their JS can be added once, at the end
+        self.markers: list[str] = []
+        # Inserted before the `</head>` of the chunk that has it
+        self.head_css = head_css
+
+    def write(self, output: str) -> None:
+        if "_RENDERED" in output:
+            self.markers.extend(match.group() for match in RENDERED_COMMENT_REGEX.finditer(output))
+            output = RENDERED_COMMENT_REGEX.sub("", output)
+        self.parts.append(output)
+        self.size += len(output)
+
+    def flush(self, min_size: int = 0) -> Iterator[str]:
+        if self.size and self.size >= min_size:
+            chunk = "".join(self.parts)
+            self.parts, self.size = [], 0
+            if self.head_css and "</head>" in chunk:
+                chunk = chunk.replace("</head>", self.head_css + "</head>", 1)
+                self.head_css = ""
+            yield chunk
+
+
+def _stream_nodelist(nodelist: NodeList, context: Context, buffer: _ChunkBuffer) -> Iterator[str]:
+    for node in nodelist:
+        if isinstance(node, ExtendsNode):
+            yield from _stream_extends(node, context, buffer)
+        elif isinstance(node, BlockNode):
+            if node.name in FLUSH_BEFORE_BLOCKS:
+                yield from buffer.flush()
+            yield from _stream_block(node, context, buffer)
+        else:
+            buffer.write(node.render_annotated(context))
+            if isinstance(node, ComponentNode):
+                yield from buffer.flush(STREAM_CHUNK_SIZE)
+
+
+def _stream_extends(node: ExtendsNode, context: Context, buffer: _ChunkBuffer) -> Iterator[str]:
+    """Streaming version of `ExtendsNode.render()`"""
+    compiled_parent = node.get_parent(context)
+
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+
+    for parent_node in compiled_parent.nodelist:
+        if not isinstance(parent_node, TextNode):
+            if not isinstance(parent_node, ExtendsNode):
+                blocks = {n.name: n for n in compiled_parent.nodelist.get_nodes_by_type(BlockNode)}
+                block_context.add_blocks(blocks)
+            break
+
+    with context.render_context.push_state(compiled_parent, isolated_context=False):
+        yield from _stream_nodelist(compiled_parent.nodelist, context, buffer)
+
+
+def _stream_block(node: BlockNode, context: Context, buffer: _ChunkBuffer) -> Iterator[str]:
+    """Streaming version of `BlockNode.render()`"""
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    with context.push():
+        if block_context is None:
+            context["block"] = node
+            yield from _stream_nodelist(node.nodelist, context, buffer)
+            return
+
+        push = block = block_context.pop(node.name)
+        if block is None:
+            block = node
+        block = type(node)(block.name, block.nodelist)
+        block.context = context
+        context["block"] = block
+        yield from _stream_nodelist(block.nodelist, context, buffer)
+        if push is not None:
+            block_context.push(node.name, push)
+
+
+def component_css() -> str:
+    """
+    Return the CSS of all registered components, as `render_dependencies()` puts it in `<head>`.
+
+    The components a page renders are known only once the page has rendered, after its head was
+    sent, so a streamed head carries the CSS of every component rather than of the used ones.
+    """
+    markers = "".join(
+        insert_component_dependencies_comment("", component, "head", None, None)
+        for component in dict.fromkeys(registry.all().values())
+    )
+    return render_dependencies(markers + "</head>").removesuffix("</head>")
+
+
+def stream_template(template_name: str, context: dict, request: HttpRequest) -> Iterator[str]:
+    """Render a template as a sequence of chunks"""
+    template = loader.get_template(template_name).template
+    render_context = make_context(context, request)
+    buffer = _ChunkBuffer(head_css=component_css())
+    sent = False
+
+    try:
+        with render_context.render_context.push_state(template):
+            with render_context.bind_template(template):
+                render_context.template_name = template.name
+                for chunk in _stream_nodelist(template.nodelist, render_context, buffer):
+                    yield chunk
+                    sent = True
+    except Exception:
+        if not sent:
+            raise
+        request_logger.error(
+            "Error while streaming template %s: %s",
+            template_name,
+            request.path,
+            exc_info=True,
+            extra={"status_code": 500, "request": request},
+        )
+        yield STREAM_ERROR_HTML
+        raise
+
+    # Without an earlier flush, the final chunk has the head and gets the CSS of the components
+    # it rendered from `render_dependencies()`, as with a regular render
+    buffer.head_css = ""
+    final_chunk = "".join(buffer.flush())
+    if buffer.markers:
+        # The JS of the components is added before </body>, as with a regular render
+        final_chunk = render_dependencies("".join(buffer.markers) + final_chunk)
+    if final_chunk:
+        yield final_chunk
+
+
+def _prepend(first_chunk: str, chunks: Iterator[str]) -> Iterator[str]:
+    yield first_chunk
+    yield from chunks
+
+
+async def _aiterate(chunks: Iterator[str]) -> AsyncIterator[str]:
+    """Render each chunk in a worker thread, so streaming under ASGI doesn't block the loop"""
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await next_chunk(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def stream_render(
+    request: HttpRequest,
+    template_name: str,
+    context: dict | None = None,
+    content_type: str | None = None,
+    status: int | None = None,
+):
+    """
+    Render a template that extends `layout.html` as a `StreamingHttpResponse`.
+
+    Falls back to `django.shortcuts.render()` when `STREAM_TEMPLATES` is off.
+    """
+    if not settings.STREAM_TEMPLATES or len(get_messages(request)):
+        return render(request, template_name, context, content_type, status)
+
+    get_token(request)
+    chunks = stream_template(template_name, context or {}, request)
+    # Rendered here, so that an error before the first flush raises from the view
+    first_chunk = next(chunks, None)
+    if first_chunk is not None:
+        chunks = _prepend(first_chunk, chunks)
+    if isinstance(request, ASGIRequest):
+        chunks = _aiterate(chunks)
+    return StreamingHttpResponse(chunks, content_type=content_type, status=status)
+
+
+class _CallOnComplete:
+    """Iterates a streamed body and calls a callback once it ends, fails or is closed"""
+
+    def __init__(self, content: Iterable[bytes], callback: Callable[[], None]):
+        self.content = content
+        self.pending = [callback]
+
+    def close(self) -> None:
+        # list.pop() is atomic, so only the first of the end of the body and close() calls it
+        try:
+            callback = self.pending.pop()
+        except IndexError:
+            return
+        callback()
+
+
+class _SyncCallOnComplete(_CallOnComplete):
+    def __iter__(self) -> Iterator[bytes]:
+        self.iterator = iter(self.content)
+        return self
+
+    def __next__(self) -> bytes:
+        try:
+            return next(self.iterator)
+        except BaseException:
+            self.close()
+            raise
+
+
+class _AsyncCallOnComplete(_CallOnComplete):
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        self.iterator = aiter(self.content)
+        return self
+
+    async def __anext__(self) -> bytes:
+        try:
+            return await anext(self.iterator)
+        except BaseException:
+            self.close()
+            raise
+
+
+def call_on_complete(response: HttpResponseBase, callback: Callable[[], None]) -> None:
+    """
+    Call `callback` once the body of a response has been generated.
+
+    That is right away for regular responses, and after the last chunk was sent (or the client
+    went away) for streaming responses, whose body renders after the middleware has returned.
+    The streamed body is wrapped in an iterator with a `close()` method, which
+    `response.close()` calls, so it's also called when the response is closed before its body
+    is iterated: when the client went away before the first chunk or on an ASGI disconnect.
+    """
+    if not response.streaming:
+        callback()
+        return
+
+    if response.is_async:
+        response.streaming_content = _AsyncCallOnComplete(response.streaming_content, callback)
+    else:
+        response.streaming_content = _SyncCallOnComplete(response.streaming_content, callback)
@@ -0,0 +1,151 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import OperationalError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.admin import (
+    AFTER_VAR,
+    BEFORE_VAR,
+    EstimatedCountPaginator,
+    KeysetPaginator,
+    estimated_count,
+)
+
+
+def partition_stats(rows: int):
+    """Answer the SQL Server estimated count query with `rows`"""
+
+    def execute_wrapper(execute, sql, params, many, context):
+        if "sys.dm_db_partition_stats" in sql:
+            assert params == [connection.ops.quote_name(User._meta.db_table)]
+            sql, params = "SELECT %s", [rows]
+        return execute(sql, params, many, context)
+
+    return execute_wrapper
+
+
+def denied(execute, sql, params, many, context):
+    raise OperationalError("VIEW DATABASE STATE permission denied")
+
+
+class EstimatedCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(User(username=f"user-{i}") for i in range(30))
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_sqlite_statistics(self):
+        self.analyze()
+        self.assertEqual(estimated_count(User.objects.all()), 30)
+
+    def test_sqlite_without_statistics(self):
+        # No ANALYZE yet, `sqlite_stat1` doesn't exist
+        self.assertIsNone(estimated_count(User.objects.all()))
+
+    def test_sql_server_partition_stats(self):
+        with (
+            mock.patch.object(connection, "vendor", "microsoft"),
+            connection.execute_wrapper(partition_stats(2_000_000)),
+        ):
+            self.assertEqual(estimated_count(User.objects.all()), 2_000_000)
+
+    def test_sql_server_without_permission(self):
+        with (
+            mock.patch.object(connection, "vendor", "microsoft"),
+            connection.execute_wrapper(denied),
+        ):
+            self.assertIsNone(estimated_count(User.objects.all()))
+
+    def test_paginator_estimates_large_unfiltered_tables(self):
+        self.analyze()
+        paginator = EstimatedCountPaginator(User.objects.all(), 10, estimated_count_threshold=20)
+        with mock.patch("core.admin.estimated_count", return_value=1_000_000):
+            self.assertEqual(paginator.count, 1_000_000)
+        self.assertTrue(paginator.estimated)
+
+    def test_paginator_counts_small_tables(self):
+        self.analyze()
+        paginator = EstimatedCountPaginator(User.objects.all(), 10, estimated_count_threshold=100)
+        self.assertEqual(paginator.count, 30)
+        self.assertFalse(paginator.estimated)
+
+    def test_paginator_counts_filtered_querysets(self):
+        queryset = User.objects.filter(username__startswith="user-1")
+        paginator = EstimatedCountPaginator(queryset, 10, estimated_count_threshold=0)
+        with mock.patch("core.admin.estimated_count", return_value=1_000_000) as estimate:
+            self.assertEqual(paginator.count, 11)
+        estimate.assert_not_called()
+        self.assertFalse(paginator.estimated)
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(User(username=f"user-{i}") for i in range(25))
+
+    def usernames(self, page) -> list[str]:
+        return [user.username for user in page.object_list]
+
+    def expected(self, queryset, number: int) -> list[str]:
+        return self.usernames(Paginator(queryset, 10).page(number))
+
+    def test_pages_match_offset_pagination(self):
+        for ordering in ("pk", "-pk", "id", "-id"):
+            queryset = User.objects.order_by(ordering)
+            for number in (1, 2, 3):
+                with self.subTest(ordering=ordering, number=number):
+                    page = KeysetPaginator(queryset, 10).page(number)
+                    self.assertEqual(self.usernames(page), self.expected(queryset, number))
+
+    def test_next_page_is_read_after_the_last_key(self):
+        queryset = User.objects.order_by("-pk")
+        first = KeysetPaginator(queryset, 10)
+        first.page(1)
+        var, key = first.cursor_for(2)
+        self.assertEqual(var, AFTER_VAR)
+
+        paginator = KeysetPaginator(queryset, 10, cursor=(2, var, key))
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.page(2)
+        self.assertEqual(self.usernames(page), self.expected(queryset, 2))
+        self.assertFalse(any("OFFSET" in query["sql"] for query in queries))
+
+    def test_previous_page_is_read_before_the_first_key(self):
+        queryset = User.objects.order_by("pk")
+        last = KeysetPaginator(queryset, 10)
+        last.page(3)
+        var, key = last.cursor_for(2)
+        self.assertEqual(var, BEFORE_VAR)
+
+        paginator = KeysetPaginator(queryset, 10, cursor=(2, var, key))
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.page(2)
+        self.assertEqual(self.usernames(page), self.expected(queryset, 2))
+        self.assertFalse(any("OFFSET" in query["sql"] for query in queries))
+
+    def test_only_adjacent_pages_have_a_cursor(self):
+        paginator = KeysetPaginator(User.objects.order_by("pk"), 10)
+        paginator.page(2)
+        self.assertIsNotNone(paginator.cursor_for(3))
+        # The first page is read without a key
+        self.assertIsNone(paginator.cursor_for(1))
+        self.assertIsNone(paginator.cursor_for(4))
+
+    def test_distant_page_seeks_its_first_key_with_offset(self):
+        queryset = User.objects.order_by("pk")
+        with CaptureQueriesContext(connection) as queries:
+            page = KeysetPaginator(queryset, 10).page(3)
+        self.assertEqual(self.usernames(page), self.expected(queryset, 3))
+        self.assertTrue(any("OFFSET 20" in query["sql"] for query in queries))
+
+    def test_other_orderings_use_offset_pagination(self):
+        queryset = User.objects.order_by("username")
+        paginator = KeysetPaginator(queryset, 10)
+        self.assertIsNone(paginator.descending)
+        self.assertEqual(self.usernames(paginator.page(2)), self.expected(queryset, 2))
@@ -0,0 +1,53 @@
+import time
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.admission import client_address, queue_time
+
+PROXY = "10.0.0.5"
+
+
+@override_settings(ADMISSION_TRUSTED_PROXIES=["10.0.0.0/8"])
+class ClientAddressTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def address(self, remote_addr: str, forwarded_for: str | None = None) -> str:
+        headers = {} if forwarded_for is None else {"x-forwarded-for": forwarded_for}
+        return client_address(self.factory.get("/", REMOTE_ADDR=remote_addr, headers=headers))
+
+    def test_direct_client(self):
+        self.assertEqual(self.address("203.0.113.7", "198.51.100.1"), "203.0.113.7")
+
+    def test_client_behind_trusted_proxy(self):
+        self.assertEqual(self.address(PROXY, "203.0.113.7"), "203.0.113.7")
+
+    def test_address_made_up_by_client_is_ignored(self):
+        self.assertEqual(self.address(PROXY, "198.51.100.1, 203.0.113.7, 10.0.0.4"), "203.0.113.7")
+
+    def test_trusted_proxy_without_header(self):
+        self.assertEqual(self.address(PROXY), PROXY)
+
+
+@override_settings(ADMISSION_TRUSTED_PROXIES=["10.0.0.0/8"])
+class QueueTimeTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.started = time.time() - 3
+
+    def test_mod_wsgi_request_start(self):
+        request = self.factory.get("/")
+        request.META["mod_wsgi.request_start"] = str(int(self.started * 1_000_000))
+        self.assertAlmostEqual(queue_time(request), 3, delta=0.5)
+
+    def test_request_start_header_of_trusted_proxy(self):
+        request = self.factory.get(
+            "/", REMOTE_ADDR=PROXY, headers={"x-request-start": f"t={int(self.started * 1000)}"}
+        )
+        self.assertAlmostEqual(queue_time(request), 3, delta=0.5)
+
+    def test_request_start_header_of_client_is_ignored(self):
+        request = self.factory.get(
+            "/", REMOTE_ADDR="203.0.113.7", headers={"x-request-start": f"t={self.started}"}
+        )
+        self.assertIsNone(queue_time(request))
@@ -0,0 +1,62 @@
+import atexit
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from django_components import Component, registry
+from prometheus_client import REGISTRY
+
+from core import metrics
+
+
+class Timed(Component):
+    template = "<p>{{ text }}</p>"
+
+    def get_template_data(self, args, kwargs, slots, context):
+        if kwargs.get("fail"):
+            raise RuntimeError("failed")
+        return {"text": "timed"}
+
+
+class MetricsExtensionTests(SimpleTestCase):
+    def setUp(self):
+        registry.register("metrics_timed", Timed)
+        self.addCleanup(registry.unregister, "metrics_timed")
+
+    def renders(self) -> float:
+        labels = {"component": "metrics_timed"}
+        sample = REGISTRY.get_sample_value("django_component_render_duration_seconds_count", labels)
+        return sample or 0
+
+    def test_render_is_timed(self):
+        before = self.renders()
+        Timed.render()
+        self.assertEqual(self.renders(), before + 1)
+
+    def test_failed_render_is_not_timed(self):
+        before = self.renders()
+        with self.assertRaises(RuntimeError):
+            Timed.render(kwargs={"fail": True})
+        self.assertEqual(self.renders(), before)
+        # The start time is kept on the component instance, not on the extension
+        self.assertFalse(hasattr(metrics.MetricsExtension, "starts"))
+
+
+class InstallTests(SimpleTestCase):
+    def test_marks_process_dead_at_exit_in_multiprocess_mode(self):
+        with (
+            mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": "/tmp/prometheus"}),
+            mock.patch.object(atexit, "register") as register,
+        ):
+            metrics.install()
+        register.assert_called_once_with(metrics.mark_process_dead)
+
+    def test_nothing_to_mark_with_a_single_process(self):
+        with (
+            mock.patch.dict(os.environ),
+            mock.patch.object(atexit, "register") as register,
+        ):
+            os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+            metrics.install()
+        register.assert_not_called()
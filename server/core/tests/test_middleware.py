@@ -0,0 +1,37 @@
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from django_components.util.context import context_processors_data
+
+from core.middleware import ReleaseComponentContextMiddleware
+from core.views import component_demo
+
+
+class ReleaseComponentContextMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.request = self.factory.get("/")
+
+    def test_components_cache_context_processors_data_per_request(self):
+        # The internal of the pinned django-components version that the middleware relies on
+        component_demo(self.request)
+        self.assertIn(self.request, context_processors_data)
+        context_processors_data.pop(self.request)
+
+    def test_data_is_released_after_the_response(self):
+        ReleaseComponentContextMiddleware(component_demo)(self.request)
+        self.assertNotIn(self.request, context_processors_data)
+
+    @override_settings(STREAM_TEMPLATES=True)
+    def test_data_is_released_after_a_streamed_response(self):
+        response = ReleaseComponentContextMiddleware(component_demo)(self.request)
+        self.assertTrue(response.streaming)
+        # Still needed by the components of the body
+        self.assertIn(self.request, context_processors_data)
+        list(response.streaming_content)
+        self.assertNotIn(self.request, context_processors_data)
+
+    @override_settings(COMPONENTS_RELEASE_CONTEXT=False)
+    def test_not_used_when_turned_off(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReleaseComponentContextMiddleware(component_demo)
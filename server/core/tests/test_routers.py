@@ -0,0 +1,180 @@
+import time
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import OperationalError, connections, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from core.routers import (
+    PRIMARY,
+    PRIMARY_COOKIE,
+    SQL_SERVER_LAG_QUERY,
+    ReplicaPinningMiddleware,
+    _use_primary,
+    _wrote,
+    replica_health,
+)
+
+REPLICAS = ["replica_1", "replica_2"]
+
+# Configured by django_project.settings_test, the tests are skipped without them
+DATABASES = {PRIMARY, *REPLICAS} & set(settings.DATABASES)
+needs_replicas = skipUnless(
+    len(DATABASES) == 3, "needs the replica databases of --settings django_project.settings_test"
+)
+
+
+def unreachable(execute, sql, params, many, context):
+    raise OperationalError("unable to open database file")
+
+
+def lagging(seconds: int):
+    """Answer the SQL Server lag query of a replica with `seconds`"""
+
+    def execute_wrapper(execute, sql, params, many, context):
+        if sql == SQL_SERVER_LAG_QUERY:
+            sql, params = "SELECT %s", [seconds]
+        return execute(sql, params, many, context)
+
+    return execute_wrapper
+
+
+@override_settings(
+    DATABASE_REPLICAS=REPLICAS,
+    DATABASE_ROUTERS=["core.routers.ReplicaRouter"],
+    DB_REPLICA_READ_AFTER_WRITE=10,
+    DB_REPLICA_MAX_LAG=30,
+)
+@needs_replicas
+class ReplicaRouterTests(TransactionTestCase):
+    # Reads in a transaction go to the primary, so the tests can't run in one (TestCase)
+    databases = DATABASES
+
+    def setUp(self):
+        replica_health.checks.clear()
+        # Each test starts as a request that hasn't written yet
+        self.addCleanup(_use_primary.reset, _use_primary.set(False))
+        self.addCleanup(_wrote.reset, _wrote.set(False))
+
+    def read_database(self) -> str:
+        return User.objects.all().db
+
+    def test_reads_are_spread_across_replicas(self):
+        self.assertEqual({self.read_database() for _ in range(100)}, set(REPLICAS))
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(User.objects.create(username="writer")._state.db, PRIMARY)
+
+    def test_reads_after_a_write_go_to_primary(self):
+        User.objects.create(username="writer")
+        self.assertEqual({self.read_database() for _ in range(20)}, {PRIMARY})
+
+    def test_reads_in_a_transaction_go_to_primary(self):
+        with transaction.atomic():
+            self.assertEqual({self.read_database() for _ in range(20)}, {PRIMARY})
+        self.assertIn(self.read_database(), REPLICAS)
+
+    def test_select_for_update_goes_to_primary(self):
+        self.assertEqual(User.objects.select_for_update().db, PRIMARY)
+
+    def test_unreachable_replica_is_skipped(self):
+        with connections["replica_2"].execute_wrapper(unreachable):
+            self.assertEqual({self.read_database() for _ in range(20)}, {"replica_1"})
+
+    def test_reads_go_to_primary_when_all_replicas_are_down(self):
+        with (
+            connections["replica_1"].execute_wrapper(unreachable),
+            connections["replica_2"].execute_wrapper(unreachable),
+        ):
+            self.assertEqual(self.read_database(), PRIMARY)
+
+    def test_lagging_replica_is_unhealthy(self):
+        for alias, lag in (("replica_1", 5), ("replica_2", 60)):
+            connection = connections[alias]
+            with (
+                mock.patch.object(connection, "vendor", "microsoft"),
+                connection.execute_wrapper(lagging(lag)),
+            ):
+                replica_health.checks.pop(alias, None)
+                self.assertEqual(replica_health.check(alias), lag <= 30)
+
+    @override_settings(DB_REPLICA_CHECK_INTERVAL=15)
+    def test_replica_is_checked_again_after_interval(self):
+        with connections["replica_2"].execute_wrapper(unreachable):
+            self.assertEqual(replica_health.healthy(), ["replica_1"])
+        # Still skipped until the next check
+        self.assertEqual(replica_health.healthy(), ["replica_1"])
+        later = time.monotonic() + 16
+        with mock.patch("core.routers.time.monotonic", return_value=later):
+            self.assertEqual(replica_health.healthy(), REPLICAS)
+
+
+@override_settings(
+    DATABASE_REPLICAS=REPLICAS,
+    DATABASE_ROUTERS=["core.routers.ReplicaRouter"],
+    DB_REPLICA_READ_AFTER_WRITE=10,
+)
+@needs_replicas
+class ReplicaPinningMiddlewareTests(TransactionTestCase):
+    databases = DATABASES
+
+    def setUp(self):
+        replica_health.checks.clear()
+        self.factory = RequestFactory()
+
+    def view(self, request):
+        if request.method == "POST":
+            User.objects.create(username="writer")
+        return HttpResponse(User.objects.all().db)
+
+    def streaming_view(self, request):
+        User.objects.create(username="writer")
+        return StreamingHttpResponse(User.objects.all().db for _ in range(3))
+
+    def request(self, method: str = "get", cookie: str | None = None, view=None) -> HttpResponse:
+        request = getattr(self.factory, method)("/")
+        if cookie is not None:
+            request.COOKIES[PRIMARY_COOKIE] = cookie
+        return ReplicaPinningMiddleware(view or self.view)(request)
+
+    def test_not_used_without_replicas(self):
+        with self.settings(DATABASE_REPLICAS=[]), self.assertRaises(MiddlewareNotUsed):
+            ReplicaPinningMiddleware(self.view)
+
+    def test_read_goes_to_replica(self):
+        response = self.request()
+        self.assertIn(response.content.decode(), REPLICAS)
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_write_pins_client_to_primary(self):
+        response = self.request("post")
+        self.assertEqual(response.content.decode(), PRIMARY)
+        cookie = response.cookies[PRIMARY_COOKIE]
+        self.assertEqual(cookie["max-age"], 10)
+        self.assertTrue(cookie["httponly"])
+
+        # The next requests of the client read from the primary
+        for _ in range(10):
+            self.assertEqual(self.request(cookie=cookie.value).content.decode(), PRIMARY)
+
+    def test_pin_expires(self):
+        cookie = self.request("post").cookies[PRIMARY_COOKIE]
+        later = time.time() + 11
+        with mock.patch("core.routers.time.time", return_value=later):
+            self.assertIn(self.request(cookie=cookie.value).content.decode(), REPLICAS)
+
+    def test_invalid_cookie_is_ignored(self):
+        self.assertIn(self.request(cookie="invalid").content.decode(), REPLICAS)
+
+    def test_pin_does_not_leak_into_next_request(self):
+        self.request("post")
+        self.assertIn(self.request().content.decode(), REPLICAS)
+
+    def test_streamed_body_reads_from_primary_after_a_write(self):
+        response = self.request("post", view=self.streaming_view)
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+        self.assertEqual(set(response.streaming_content), {PRIMARY.encode()})
+        self.assertIn(self.request().content.decode(), REPLICAS)
@@ -0,0 +1,49 @@
+from io import StringIO
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import Group, User
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+
+@override_settings(
+    SESSION_ENGINE="django.contrib.sessions.backends.db",
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class SeedCommandTests(TestCase):
+    def seed(self, **options) -> str:
+        stdout = StringIO()
+        call_command("seed", groups=3, force=True, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_seeds_users_groups_and_sessions(self):
+        self.seed(users=20, sessions=15, password="secret")
+        users = User.objects.filter(username__startswith="seed-")
+        self.assertEqual(users.count(), 20)
+        self.assertEqual(Group.objects.filter(name__startswith="seed-group-").count(), 3)
+        self.assertEqual(Session.objects.count(), 15)
+        self.assertFalse(users.filter(is_staff=True).exists())
+        self.assertIsNotNone(authenticate(username="seed-0000000", password="secret"))
+
+    def test_clear_replaces_the_seeded_users(self):
+        self.seed(users=20, password="secret")
+        with self.assertRaisesMessage(CommandError, "use --clear"):
+            self.seed(users=10, password="secret")
+        output = self.seed(users=10, password="secret", clear=True)
+        self.assertIn("deleted users: 20 rows", output)
+        self.assertEqual(User.objects.filter(username__startswith="seed-").count(), 10)
+
+    def test_staff_is_opt_in(self):
+        self.seed(users=20, password="secret", staff=1)
+        self.assertEqual(User.objects.filter(is_staff=True).count(), 20)
+
+    def test_random_password_is_printed(self):
+        output = self.seed(users=1)
+        password = output.split("Password of the seeded users: ")[1].split()[0]
+        self.assertIsNotNone(authenticate(username="seed-0000000", password=password))
+
+    def test_refuses_without_debug(self):
+        with self.assertRaisesMessage(CommandError, "--force"):
+            call_command("seed", users=1, stdout=StringIO())
+        self.assertFalse(User.objects.exists())
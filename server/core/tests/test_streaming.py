@@ -0,0 +1,194 @@
+import asyncio
+import re
+from unittest import mock
+
+from django.contrib import messages
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import path
+
+from django_components import Component, registry
+from prometheus_client import REGISTRY
+
+from core.streaming import STREAM_ERROR_HTML, call_on_complete, stream_render
+from core.views import component_demo
+
+COMPONENT_ID_REGEX = re.compile(r"data-djc-id-\w+")
+
+
+class Styled(Component):
+    template = '<p class="styled">Styled</p>'
+
+    class Media:
+        css = "styled.css"
+
+
+class Exploding:
+    def __iter__(self):
+        raise RuntimeError("exploded")
+
+
+def streaming_view(request):
+    return StreamingHttpResponse(iter([b"<head>", b"<body>"]))
+
+
+urlpatterns = [
+    path("stream/", streaming_view, name="stream"),
+]
+
+
+class CallOnCompleteTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = 0
+
+    def callback(self):
+        self.calls += 1
+
+    def test_regular_response(self):
+        call_on_complete(HttpResponse(b"body"), self.callback)
+        self.assertEqual(self.calls, 1)
+
+    def test_streaming_response(self):
+        response = StreamingHttpResponse(iter([b"a", b"b"]))
+        call_on_complete(response, self.callback)
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(b"".join(response), b"ab")
+        self.assertEqual(self.calls, 1)
+        response.close()
+        self.assertEqual(self.calls, 1)
+
+    def test_async_streaming_response(self):
+        async def content():
+            yield b"a"
+            yield b"b"
+
+        async def consume(response):
+            return [chunk async for chunk in response]
+
+        response = StreamingHttpResponse(content())
+        call_on_complete(response, self.callback)
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(asyncio.run(consume(response)), [b"a", b"b"])
+        self.assertEqual(self.calls, 1)
+        response.close()
+        self.assertEqual(self.calls, 1)
+
+    def test_streaming_response_closed_before_iterating(self):
+        response = StreamingHttpResponse(iter([b"a", b"b"]))
+        call_on_complete(response, self.callback)
+        response.close()
+        self.assertEqual(self.calls, 1)
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    ALLOWED_HOSTS=["testserver"],
+    METRICS_ENABLED=False,
+    ADMISSION_CONTROL=False,
+    SQL_INSTRUMENTATION_SAMPLE_RATE=0,
+)
+class StreamingMiddlewareTests(SimpleTestCase):
+    """Middleware that finishes after the body was streamed, when the client goes away first"""
+
+    def setUp(self):
+        self.handler = WSGIHandler()
+        self.factory = RequestFactory()
+
+    def close_before_iterating(self) -> int:
+        """Request the streamed page like a client that disconnects before the first chunk"""
+        statuses = []
+        response = self.handler(
+            self.factory.get("/stream/").environ,
+            lambda status, headers: statuses.append(int(status.split()[0])),
+        )
+        response.close()
+        return statuses[0]
+
+    @override_settings(ADMISSION_CONTROL=True, ADMISSION_MAX_IN_FLIGHT=2)
+    def test_admission_releases_in_flight_slot(self):
+        statuses = [self.close_before_iterating() for _ in range(5)]
+        self.assertEqual(statuses, [200] * 5)
+
+    @override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=1)
+    def test_query_instrumentation_removes_execute_wrapper(self):
+        for _ in range(3):
+            self.close_before_iterating()
+        for connection in connections.all():
+            self.assertEqual(connection.execute_wrappers, [])
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_metrics_record_response_and_remove_execute_wrapper(self):
+        labels = {"view": "stream", "status": "200"}
+        before = REGISTRY.get_sample_value("django_http_responses_total", labels) or 0
+        for _ in range(3):
+            self.close_before_iterating()
+        self.assertEqual(
+            REGISTRY.get_sample_value("django_http_responses_total", labels), before + 3
+        )
+        for connection in connections.all():
+            self.assertEqual(connection.execute_wrappers, [])
+
+
+@override_settings(STREAM_TEMPLATES=True)
+class StreamRenderTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def stream(self, response) -> list[str]:
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return [chunk.decode() for chunk in response.streaming_content]
+
+    def test_output_matches_render(self):
+        streamed = "".join(self.stream(component_demo(self.factory.get("/"))))
+        with self.settings(STREAM_TEMPLATES=False):
+            rendered = component_demo(self.factory.get("/")).content.decode()
+        # Components get a new id on each render
+        self.assertEqual(COMPONENT_ID_REGEX.sub("", streamed), COMPONENT_ID_REGEX.sub("", rendered))
+
+    def test_head_is_the_first_chunk(self):
+        chunks = self.stream(component_demo(self.factory.get("/")))
+        self.assertIn("</head>", chunks[0])
+        # Flushed up to the content block
+        self.assertTrue(
+            any(chunk.rstrip().endswith('<main id="main-content">') for chunk in chunks)
+        )
+        self.assertTrue(chunks[-1].rstrip().endswith("</html>"))
+
+    def test_component_css_is_sent_in_head(self):
+        registry.register("styled", Styled)
+        self.addCleanup(registry.unregister, "styled")
+        chunks = self.stream(component_demo(self.factory.get("/")))
+        head = chunks[0][: chunks[0].index("</head>")]
+        self.assertIn("styled.css", head)
+        self.assertEqual("".join(chunks).count("styled.css"), 1)
+
+    def test_pending_messages_are_rendered_regularly(self):
+        request = self.factory.get("/")
+        request._messages = CookieStorage(request)
+        messages.success(request, "Saved")
+        response = stream_render(request, "component_demo.html")
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+
+    def test_error_after_the_first_chunk_ends_the_stream_with_a_notice(self):
+        response = stream_render(
+            self.factory.get("/"), "component_demo.html", {"accordion_items": Exploding()}
+        )
+        chunks = []
+        with (
+            self.assertLogs("django.request", "ERROR"),
+            self.assertRaisesMessage(RuntimeError, "exploded"),
+        ):
+            for chunk in response.streaming_content:
+                chunks.append(chunk.decode())
+        self.assertIn("</head>", chunks[0])
+        self.assertEqual(chunks[-1], STREAM_ERROR_HTML)
+
+    def test_error_before_the_first_chunk_raises_from_the_view(self):
+        with (
+            mock.patch("core.streaming.component_css", side_effect=RuntimeError("exploded")),
+            self.assertRaisesMessage(RuntimeError, "exploded"),
+        ):
+            stream_render(self.factory.get("/"), "component_demo.html")
@@ -1,7 +1,9 @@
 """Views for the core app."""
 
 from django.http import HttpRequest, HttpResponse
-from django.shortcuts import render
+
+from .preload import preload_assets
+from .streaming import stream_render
 
 
 def health_check(request: HttpRequest):
@@ -9,6 +11,7 @@ def health_check(request: HttpRequest):
     return HttpResponse(b"OK", content_type="text/plain", status=200)
 
 
+@preload_assets("layout.html")
 def component_demo(request: HttpRequest):
     """Demo page showcasing all available USWDS components."""
     context = {
@@ -31,4 +34,4 @@ def component_demo(request: HttpRequest):
             },
         ],
     }
-    return render(request, "component_demo.html", context)
+    return stream_render(request, "component_demo.html", context)
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
 
 application = get_asgi_application()
+
+from core.preload import EarlyHintsMiddleware  # noqa: E402
+
+# Sends 103 Early Hints for the critical assets of a page on servers that support them
+application = EarlyHintsMiddleware(application)
@@ -44,6 +44,14 @@ def get_env_int(key: str, default: int = 0) -> int:
         return default
 
 
+def get_env_float(key: str, default: float = 0.0) -> float:
+    """Get float environment variable"""
+    try:
+        return float(os.getenv(key, str(default)))
+    except ValueError:
+        return default
+
+
 def get_env_list(key: str, default: list[str] | None = None) -> list[str]:
     """Get comma-separated list from environment variable"""
     value = os.getenv(key, "")
@@ -89,12 +97,16 @@ INSTALLED_APPS = [
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
-    "django.contrib.staticfiles",
+    "core.apps.StaticFilesConfig",  # django.contrib.staticfiles without the unsubset fonts
     "django_components",
     "core",
 ]
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
+    "core.admission.AdmissionControlMiddleware",
+    "core.queries.QueryInstrumentationMiddleware",
+    "core.routers.ReplicaPinningMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -102,10 +114,77 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.preload.PreloadMiddleware",
+    "core.middleware.ReleaseComponentContextMiddleware",
 ]
 
 ROOT_URLCONF = "django_project.urls"
 
+# Cache compiled templates and inline pure components, see `django_project.template_loaders`.
+# Off in development, so template changes show up without restarting the server
+CACHE_TEMPLATES = get_env_bool("CACHE_TEMPLATES", default=(MODE == "prod"))
+
+# Strip HTML comments and insignificant whitespace from project templates when they are compiled
+# and cached (with CACHE_TEMPLATES)
+COMPACT_TEMPLATES = get_env_bool("COMPACT_TEMPLATES", default=(MODE == "prod"))
+
+TEMPLATE_LOADERS = [
+    "django_components.template_loader.Loader",
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+if CACHE_TEMPLATES:
+    TEMPLATE_LOADERS = [
+        (
+            "django_project.template_loaders.Loader",
+            TEMPLATE_LOADERS,
+            [BASE_DIR / "templates", BASE_DIR / "components"] if COMPACT_TEMPLATES else [],
+        ),
+    ]
+
+# Send the page head before the body has rendered in views using `core.streaming.stream_render`
+STREAM_TEMPLATES = get_env_bool("STREAM_TEMPLATES", default=(MODE == "prod"))
+
+# Serve Prometheus metrics at METRICS_PATH, see `core.metrics`
+METRICS_ENABLED = get_env_bool("METRICS_ENABLED", default=True)
+METRICS_PATH = "/metrics"
+
+# Networks allowed to scrape the metrics, loopback only by default. Behind a load balancer or
+# reverse proxy every client comes from a private address, so add only the scraper's network
+# (e.g. the address of a Prometheus container on the same Docker network)
+METRICS_ALLOWED_NETWORKS = get_env_list("METRICS_ALLOWED_NETWORKS", ["127.0.0.0/8", "::1/128"])
+
+# Turn requests away with a fast 503 when the process is overloaded, see `core.admission`
+ADMISSION_CONTROL = get_env_bool("ADMISSION_CONTROL", default=True)
+
+# Requests a process handles at once before it sheds load (0 = no limit). Under mod_wsgi the
+# daemon threads already cap this, so the queue time is what shows the overload
+ADMISSION_MAX_IN_FLIGHT = get_env_int("ADMISSION_MAX_IN_FLIGHT", 0)
+
+# Milliseconds a request may wait in the server's queue before it is shed (0 = no limit). The
+# wait is known under mod_wsgi, or behind a trusted proxy that sets `X-Request-Start`
+ADMISSION_MAX_QUEUE_MS = get_env_int("ADMISSION_MAX_QUEUE_MS", 0)
+
+# Seconds clients are told to wait in the Retry-After header of shed requests
+ADMISSION_RETRY_AFTER = get_env_int("ADMISSION_RETRY_AFTER", 5)
+
+# Requests per second (and burst size) allowed per client address and for the whole site,
+# shared through Redis (0 = no limit)
+ADMISSION_CLIENT_RATE = get_env_float("ADMISSION_CLIENT_RATE", 0)
+ADMISSION_CLIENT_BURST = get_env_int("ADMISSION_CLIENT_BURST", 20)
+ADMISSION_GLOBAL_RATE = get_env_float("ADMISSION_GLOBAL_RATE", 0)
+ADMISSION_GLOBAL_BURST = get_env_int("ADMISSION_GLOBAL_BURST", 200)
+
+# Networks of the load balancers and reverse proxies in front of the app, whose
+# `X-Forwarded-For` and `X-Request-Start` headers are trusted
+ADMISSION_TRUSTED_PROXIES = get_env_list("ADMISSION_TRUSTED_PROXIES", [])
+
+# Paths that are never shed, so the node isn't pulled from the load balancer under load
+ADMISSION_EXEMPT_PATHS = get_env_list("ADMISSION_EXEMPT_PATHS", ["/health/"])
+
+# Send preload hints for the critical assets of views using `core.preload.preload_assets`
+PRELOAD_ASSETS = get_env_bool("PRELOAD_ASSETS", default=True)
+
 TEMPLATES = [  # type: ignore
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -120,20 +199,26 @@ TEMPLATES = [  # type: ignore
             "builtins": [
                 "django_components.templatetags.component_tags",
             ],
-            "loaders": [
-                "django_components.template_loader.Loader",
-                "django.template.loaders.filesystem.Loader",
-                "django.template.loaders.app_directories.Loader",
-            ],
+            "loaders": TEMPLATE_LOADERS,
         },
     },
 ]
 
+# "django" gives components the whole context of the page, "isolated" only their arguments. The
+# components work in both (`core.checks` flags templates that need the page context), "django"
+# renders faster as isolation copies the context per component (`just bench-nested-components`)
+COMPONENTS_CONTEXT_BEHAVIOR = get_env("COMPONENTS_CONTEXT_BEHAVIOR", ContextBehavior.DJANGO.value)
+
+# Drop the context processors data django-components caches per request once the response is
+# sent, which it otherwise keeps for good (`core.middleware`). Relies on an internal of the
+# django-components version pinned in pyproject.toml, turn off if an upgrade breaks it
+COMPONENTS_RELEASE_CONTEXT = get_env_bool("COMPONENTS_RELEASE_CONTEXT", default=True)
+
 # Django Components Configuration
 COMPONENTS = ComponentsSettings(
     autodiscover=True,
     cache=None,
-    context_behavior=ContextBehavior.DJANGO.value,  # "django" | "isolated"
+    context_behavior=COMPONENTS_CONTEXT_BEHAVIOR,
     # Root-level "components" dirs, e.g. `/path/to/proj/components/`
     dirs=[Path(BASE_DIR) / "components"],
     # App-level "components" dirs, e.g. `[app]/components/`
@@ -141,7 +226,8 @@ COMPONENTS = ComponentsSettings(
     debug_highlight_components=False,
     debug_highlight_slots=False,
     dynamic_component_name="dynamic",
-    extensions=[],
+    # Times the component renders for the metrics
+    extensions=["core.metrics.MetricsExtension"],
     extensions_defaults={},
     libraries=[],  # E.g. ["mysite.components.forms", ...]
     multiline_tags=True,
@@ -167,11 +253,7 @@ COMPONENTS = ComponentsSettings(
         ".tif",
         ".tiff",
         # Fonts
-        ".eot",
-        ".ttf",
-        ".woff",
-        ".otf",
-        ".svg",
+        ".woff2",
     ],
     static_files_forbidden=[
         ".html",
@@ -203,6 +285,64 @@ DB_NAME = get_env("DB_NAME", "")
 DB_USER = get_env("DB_USER", "")
 DB_PASS = get_env("DB_PASS", "")
 
+# Seconds a connection is kept open and reused by the requests of a worker thread, instead of
+# opening a new one (TCP + TLS + login) per request. 0 closes it after each request, the default
+# since under ASGI requests don't reuse threads and persistent connections pile up. The WSGI
+# deployment (mod_wsgi, see infra/prod.Dockerfile) sets 600
+DB_CONN_MAX_AGE = get_env_int("DB_CONN_MAX_AGE", 0)
+
+# Check that a reused connection still works before the first query of a request, so a
+# connection dropped by the server or a failover is replaced instead of failing the request
+DB_CONN_HEALTH_CHECKS = get_env_bool("DB_CONN_HEALTH_CHECKS", default=True)
+
+# ODBC driver manager connection pooling (pyodbc.pooling), a connection closed by Django goes
+# back to the pool of the worker process and is handed to the next connect. Needs `Pooling=Yes`
+# in odbcinst.ini, see infra/*.Dockerfile
+DB_ODBC_POOLING = get_env_bool("DB_ODBC_POOLING", default=True)
+
+# Log the connections of each worker process every N requests (0 only logs at exit)
+DB_CONNECTION_REPORT_INTERVAL = get_env_int("DB_CONNECTION_REPORT_INTERVAL", 0)
+
+# Readable secondaries of the SQL Server Availability Group, with the credentials of `default`.
+# Each host becomes a `replica_N` database that `core.routers.ReplicaRouter` sends reads to
+DB_REPLICA_HOSTS = get_env_list("DB_REPLICA_HOSTS", [])
+DB_REPLICA_PORT = get_env_int("DB_REPLICA_PORT", DB_PORT)
+
+# Seconds a client that wrote keeps reading from the primary, so it sees its own changes
+DB_REPLICA_READ_AFTER_WRITE = get_env_int("DB_REPLICA_READ_AFTER_WRITE", 10)
+
+# A replica lagging behind the primary by more seconds than this is skipped
+DB_REPLICA_MAX_LAG = get_env_int("DB_REPLICA_MAX_LAG", 30)
+
+# Seconds between the availability and lag checks of a replica by each worker process
+DB_REPLICA_CHECK_INTERVAL = get_env_int("DB_REPLICA_CHECK_INTERVAL", 15)
+
+# Fraction of requests whose SQL queries are counted and timed by
+# `core.queries.QueryInstrumentationMiddleware` (0 disables it)
+SQL_INSTRUMENTATION_SAMPLE_RATE = get_env_float(
+    "SQL_INSTRUMENTATION_SAMPLE_RATE", default=(0.1 if MODE == "prod" else 1.0)
+)
+
+# Queries of sampled requests that take longer than this are logged
+SQL_SLOW_QUERY_MS = get_env_int("SQL_SLOW_QUERY_MS", 100)
+
+# A query shape that runs this many times in a sampled request is logged as a probable N+1
+SQL_N_PLUS_ONE_THRESHOLD = get_env_int("SQL_N_PLUS_ONE_THRESHOLD", 5)
+
+# Trace allocations and serve the memory report of each worker process at
+# /diagnostics/memory/ (staff only), see `core.memory`. Off by default: tracemalloc slows
+# every allocation down and adds to the memory of the process
+MEMORY_DIAGNOSTICS = get_env_bool("MEMORY_DIAGNOSTICS", default=False)
+
+# Frames kept per traced allocation, more attribute it better but cost more (0 = don't trace)
+MEMORY_DIAGNOSTICS_FRAMES = get_env_int("MEMORY_DIAGNOSTICS_FRAMES", 1)
+
+# Allocation sites and object types listed in a memory report
+MEMORY_DIAGNOSTICS_TOP = get_env_int("MEMORY_DIAGNOSTICS_TOP", 25)
+
+# Read by mssql-django before it opens the first connection
+DATABASE_CONNECTION_POOLING = DB_ODBC_POOLING
+
 if DB_HOST and DB_NAME and DB_USER and DB_PASS:
     DATABASES = {  # type: ignore
         "default": {
@@ -212,20 +352,46 @@ if DB_HOST and DB_NAME and DB_USER and DB_PASS:
             "PASSWORD": DB_PASS,
             "HOST": DB_HOST,
             "PORT": str(DB_PORT),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
             "OPTIONS": {
                 "driver": "ODBC Driver 18 for SQL Server",
-                "extra_params": "TrustServerCertificate=yes",
+                # ConnectRetryCount lets the driver transparently reconnect an idle connection
+                # that was broken (connection resiliency)
+                "extra_params": (
+                    "TrustServerCertificate=yes;ConnectRetryCount=3;ConnectRetryInterval=5"
+                ),
             },
         }
     }
+    DATABASE_REPLICAS = [f"replica_{i}" for i in range(1, len(DB_REPLICA_HOSTS) + 1)]
+    for alias, host in zip(DATABASE_REPLICAS, DB_REPLICA_HOSTS, strict=True):
+        options = DATABASES["default"]["OPTIONS"]
+        DATABASES[alias] = {
+            **DATABASES["default"],
+            "HOST": host,
+            "PORT": str(DB_REPLICA_PORT),
+            "OPTIONS": {
+                **options,
+                "extra_params": f"{options['extra_params']};ApplicationIntent=ReadOnly",
+            },
+            # Tests run against the primary only
+            "TEST": {"MIRROR": "default"},
+        }
 else:
     # Fallback to SQLite for local development
     DATABASES = {  # type: ignore
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
         }
     }
+    DATABASE_REPLICAS = []
+
+# Reads go to a healthy replica and writes to the primary, see `core.routers`
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"] if DATABASE_REPLICAS else []
 
 
 ###############################################################################
@@ -239,14 +405,20 @@ else:
 REDIS_HOST = get_env("REDIS_HOST", "localhost")
 REDIS_PORT = get_env_int("REDIS_PORT", 6379)
 REDIS_DB = get_env_int("REDIS_DB", 0)
+# Seconds to wait for Redis to connect or answer, so a stalled Redis fails requests fast instead
+# of blocking them (the rate limits then fall back to per-process buckets)
+REDIS_SOCKET_TIMEOUT = get_env_float("REDIS_SOCKET_TIMEOUT", 1.0)
 
 
 CACHES = {  # type: ignore
     "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
+        # django_redis.cache.RedisCache that counts hits and misses for the metrics
+        "BACKEND": "core.metrics.MetricsRedisCache",
         "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}",
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SOCKET_CONNECT_TIMEOUT": REDIS_SOCKET_TIMEOUT,
+            "SOCKET_TIMEOUT": REDIS_SOCKET_TIMEOUT,
         },
         "KEY_PREFIX": "uswds_django",
         "TIMEOUT": 300,  # 5 minutes default timeout
@@ -363,6 +535,22 @@ STATIC_ROOT = BASE_DIR / "staticfiles/"
 STATIC_URL = "assets/"
 STATICFILES_DIRS = [BASE_DIR / "public"]
 
+# Responsive image variants generated by `manage.py build_images`, served as static files
+DERIVED_IMAGES_ROOT = BASE_DIR / "public" / "derived"
+
+# Fingerprinted file names in production, so Apache can serve them with a long cache lifetime
+# NOTE: Requires `collectstatic`, which the production image runs at build time
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
+            if MODE == "prod"
+            else "django.contrib.staticfiles.storage.StaticFilesStorage"
+        )
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -407,8 +595,17 @@ LOGGING = {  # type: ignore
             "formatter": LOG_FORMATTER,
             "stream": "ext://sys.stdout",
         },
+        # SQL instrumentation records are always structured, so they can be queried
+        "stdout_json": {
+            "class": "logging.StreamHandler",
+            "formatter": "json",
+            "stream": "ext://sys.stdout",
+        },
+    },
+    "loggers": {
+        "root": {"level": get_env("LOG_LEVEL", "INFO"), "handlers": ["stdout"]},
+        "core.queries": {"handlers": ["stdout_json"], "propagate": False},
     },
-    "loggers": {"root": {"level": get_env("LOG_LEVEL", "INFO"), "handlers": ["stdout"]}},
 }
 
 
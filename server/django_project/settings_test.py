@@ -0,0 +1,18 @@
+"""
+Settings for the tests, `manage.py test server --settings django_project.settings_test` (the
+test recipes of the Justfile).
+"""
+
+from .settings import *  # noqa: F403
+from .settings import BASE_DIR, DATABASES
+
+# SQLite stand-ins for the replicas in the tests of `core.routers`, unused until a test sets
+# DATABASE_REPLICAS and DATABASE_ROUTERS. Replicas configured by DB_REPLICA_HOSTS are kept
+DATABASES = {
+    **DATABASES,
+    **{
+        alias: {"ENGINE": "django.db.backends.sqlite3", "NAME": BASE_DIR / f"{alias}.sqlite3"}
+        for alias in ("replica_1", "replica_2")
+        if alias not in DATABASES
+    },
+}
@@ -0,0 +1,242 @@
+"""
+Template loaders that do extra work once, when a template is compiled, instead of on every render
+"""
+
+import os
+import re
+
+from django.template import Context, NodeList
+from django.template.base import TextNode
+from django.template.loaders import cached
+
+from django_components.component import ComponentNode
+from django_components.dependencies import COMPONENT_COMMENT_REGEX
+
+# Dependency markers are only needed by components that ship JS/CSS, which pure components don't
+RENDERED_COMMENT_REGEX = re.compile(COMPONENT_COMMENT_REGEX.pattern.decode())
+
+LITERAL_KEYWORDS = ("True", "False", "None")
+
+# Whitespace next to these tags never renders, so it can be dropped entirely
+BLOCK_TAGS = frozenset(
+    (
+        "address article aside blockquote body dd details dialog div dl dt fieldset figcaption "
+        "figure footer form h1 h2 h3 h4 h5 h6 head header hr html main nav ol p section summary "
+        "table tbody td tfoot th thead tr ul"
+    ).split()
+)
+
+# Elements that render nothing, so whitespace between two of them can be dropped as well
+METADATA_TAGS = frozenset(("base", "link", "meta", "noscript", "script", "style", "title"))
+
+TEMPLATE_TOKEN_REGEX = re.compile(
+    r"""
+    (?P<django>\{%.*?%\}|\{\{.*?\}\}|\{\#.*?\#\})
+    | (?P<comment><!--(?!\[if).*?-->)
+    | (?P<raw><(?P<raw_name>pre|textarea|script|style)\b.*?</(?P=raw_name)\s*>)
+    | (?P<tag></?(?P<tag_name>[a-zA-Z][\w-]*)(?:
+        \{%.*?%\} | \{\{.*?\}\}
+        | "(?:\{%.*?%\}|\{\{.*?\}\}|[^"])*" | '(?:\{%.*?%\}|\{\{.*?\}\}|[^'])*'
+        | \{(?![%{]) | [^<>{"']
+    )*>)
+    """,
+    re.DOTALL | re.IGNORECASE | re.VERBOSE,
+)
+
+NEWLINE_WHITESPACE_REGEX = re.compile(r"\s*\n\s*")
+
+# Django tags that never output markup of their own, so whitespace can be judged across them
+SILENT_DJANGO_TAG_REGEX = re.compile(
+    r"\{#|\{%\s*(?:if|elif|else|endif|for|empty|endfor|block|endblock|with|endwith|load)\b"
+)
+
+# Of those, tags past which the markup may not render, so whitespace can't be judged across them
+CONDITIONAL_DJANGO_TAG_REGEX = re.compile(
+    r"\{%\s*(?:if|elif|else|endif|for|empty|endfor|block|endblock)\b"
+)
+
+
+def is_literal_value(value) -> bool:
+    """Check that a parsed `{% component %}` argument is a plain string, number or keyword"""
+    if value.type != "simple" or value.spread or len(value.entries) != 1:
+        return False
+
+    parts = value.entries[0].parts
+    if len(parts) != 1:
+        return False
+
+    part = parts[0]
+    if part.filter or part.spread or part.translation:
+        return False
+    if part.quoted:
+        # Strings like "{{ user.name }}" are dynamic expressions resolved against the context
+        return "{{" not in part.value and "{%" not in part.value
+
+    if part.value in LITERAL_KEYWORDS:
+        return True
+    try:
+        float(part.value)
+    except ValueError:
+        return False
+    return True
+
+
+def compact_whitespace(source: str) -> str:
+    """
+    Strip HTML comments and insignificant whitespace from a template source.
+
+    Whitespace next to a block-level tag is removed and other runs of whitespace that span lines
+    are collapsed to a single newline, so the page renders exactly as before. A block-level tag
+    past an `{% if %}`, `{% for %}` or `{% block %}` tag may not render, so whitespace next to
+    those is only collapsed. Tags with their attributes, Django tags and the contents of `<pre>`,
+    `<textarea>`, `<script>` and `<style>` are never touched.
+    """
+    # Split the source into (kind, text, tag name) tokens, where kind is None for plain text
+    tokens = []
+    position = 0
+    for match in TEMPLATE_TOKEN_REGEX.finditer(source):
+        if match.start() > position:
+            tokens.append((None, source[position : match.start()], None))
+        kind = next(name for name in ("django", "comment", "raw", "tag") if match.group(name))
+        name = (match.group("raw_name") or match.group("tag_name") or "").lower()
+        if kind != "comment":
+            tokens.append((kind, match.group(), name))
+        position = match.end()
+    if position < len(source):
+        tokens.append((None, source[position:], None))
+
+    def neighbour_tag(index: int, step: int) -> str | None:
+        index += step
+        while 0 <= index < len(tokens) and (
+            SILENT_DJANGO_TAG_REGEX.match(tokens[index][1]) or not tokens[index][1].strip()
+        ):
+            if CONDITIONAL_DJANGO_TAG_REGEX.match(tokens[index][1]):
+                # The tag past it may render nothing, whitespace is then next to something else
+                return None
+            index += step
+        if 0 <= index < len(tokens) and tokens[index][0] in ("tag", "raw"):
+            return tokens[index][2]
+        return None
+
+    output = []
+    for index, (kind, text, _name) in enumerate(tokens):
+        if kind is None and not text.strip():
+            previous_tag, next_tag = neighbour_tag(index, -1), neighbour_tag(index, 1)
+            if (
+                previous_tag in BLOCK_TAGS
+                or next_tag in BLOCK_TAGS
+                or (previous_tag in METADATA_TAGS and next_tag in METADATA_TAGS)
+            ):
+                text = ""
+            elif "\n" in text:
+                text = "\n"
+        elif kind is None:
+            text = NEWLINE_WHITESPACE_REGEX.sub("\n", text)
+            if neighbour_tag(index, -1) in BLOCK_TAGS:
+                text = text.lstrip()
+            if neighbour_tag(index, 1) in BLOCK_TAGS:
+                text = text.rstrip()
+        output.append(text)
+
+    return "".join(output)
+
+
+def render_pure_component(node: ComponentNode) -> str | None:
+    """
+    Render a `{% component %}` tag ahead of time, or return None if it depends on the request.
+
+    A component sets `pure = True` to declare that its output depends only on its arguments: not
+    on the context of the page, the request, the time or the database. Its tags are rendered
+    ahead of time when every argument is a literal and the tag has no fills.
+    """
+    component_cls = node.registry.get(node.name)
+    if not getattr(component_cls, "pure", False):
+        return None
+    if any((component_cls.js, component_cls.js_file, component_cls.css, component_cls.css_file)):
+        return None
+    if not all(isinstance(child, TextNode) and not child.s.strip() for child in node.nodelist):
+        return None
+    if not all(is_literal_value(param.value) for param in node.params):
+        return None
+
+    args = []
+    kwargs = {}
+    for param in node.params:
+        value = param.value.resolve(Context())
+        if param.key:
+            kwargs[param.key] = value
+        else:
+            args.append(value)
+
+    try:
+        html = component_cls.render(
+            args=args,
+            kwargs=kwargs,
+            deps_strategy="ignore",
+            registry=node.registry,
+            registered_name=node.name,
+        )
+    except Exception:
+        # Leave the tag in place so the error is raised, with its usual trace, at request time
+        return None
+
+    return RENDERED_COMMENT_REGEX.sub("", html)
+
+
+def inline_pure_components(nodelist: NodeList) -> None:
+    """Replace pure `{% component %}` tags in a compiled nodelist with their rendered HTML"""
+    for index, node in enumerate(nodelist):
+        if isinstance(node, ComponentNode):
+            html = render_pure_component(node)
+            if html is not None:
+                nodelist[index] = TextNode(html)
+                continue
+
+        # `{% if %}` keeps its branches in `conditions_nodelists`, `nodelist` is only a copy
+        if hasattr(node, "conditions_nodelists"):
+            child_nodelists = [branch for _, branch in node.conditions_nodelists]
+        else:
+            child_nodelists = [getattr(node, attr, None) for attr in node.child_nodelists]
+
+        for child_nodelist in child_nodelists:
+            if child_nodelist:
+                inline_pure_components(child_nodelist)
+
+
+class Loader(cached.Loader):
+    """
+    Cached template loader that does extra work once, when a template is first compiled:
+
+    - Templates under `compact_dirs` have HTML comments and insignificant whitespace removed
+    - Pure components called with literal arguments are rendered and inlined
+
+    Usage (settings.py):
+
+        "loaders": [
+            (
+                "django_project.template_loaders.Loader",
+                [
+                    "django.template.loaders.filesystem.Loader",
+                    ...
+                ],
+                [BASE_DIR / "templates"],  # optional, directories to compact
+            ),
+        ],
+    """
+
+    def __init__(self, engine, loaders, compact_dirs=()):
+        super().__init__(engine, loaders)
+        self.compact_dirs = tuple(os.path.join(path, "") for path in compact_dirs)
+
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        if self.compact_dirs and str(origin.name).startswith(self.compact_dirs):
+            contents = compact_whitespace(contents)
+        return contents
+
+    def get_template(self, template_name, skip=None):
+        is_cached = self.cache_key(template_name, skip) in self.get_template_cache
+        template = super().get_template(template_name, skip)
+        if not is_cached:
+            inline_pure_components(template.nodelist)
+        return template
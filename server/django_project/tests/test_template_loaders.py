@@ -0,0 +1,80 @@
+import re
+
+from django.template import engines
+from django.test import SimpleTestCase
+
+from django_project.template_loaders import BLOCK_TAGS, compact_whitespace
+
+BLOCK_TAG_REGEX = re.compile(rf"\s*(</?(?:{'|'.join(BLOCK_TAGS)})\b[^>]*>)\s*")
+
+
+def visible(html: str) -> str:
+    """Collapse whitespace the way the browser does, and drop it around block-level tags"""
+    return BLOCK_TAG_REGEX.sub(r"\1", re.sub(r"\s+", " ", html)).strip()
+
+
+class CompactWhitespaceTests(SimpleTestCase):
+    def assert_renders_the_same(self, source: str, contexts: list[dict]):
+        engine = engines["django"]
+        for context in contexts:
+            with self.subTest(context=context):
+                self.assertEqual(
+                    visible(engine.from_string(compact_whitespace(source)).render(context)),
+                    visible(engine.from_string(source).render(context)),
+                )
+
+    def test_whitespace_next_to_block_tags_is_removed(self):
+        self.assertEqual(
+            compact_whitespace("<div>\n  <p>Text</p>\n  <!-- note -->\n</div>\n"),
+            "<div><p>Text</p></div>",
+        )
+
+    def test_whitespace_between_inline_tags_is_collapsed(self):
+        self.assertEqual(
+            compact_whitespace("<span>A</span>\n    <span>B</span>"),
+            "<span>A</span>\n<span>B</span>",
+        )
+
+    def test_block_tag_inside_if(self):
+        self.assert_renders_the_same(
+            "<span>A</span>\n{% if x %}<div>d</div>{% endif %}\n<span>B</span>",
+            [{"x": True}, {"x": False}],
+        )
+
+    def test_block_tag_inside_for(self):
+        self.assert_renders_the_same(
+            "<span>A</span>\n{% for item in items %}\n<p>{{ item }}</p>\n{% endfor %}\n"
+            "<span>B</span>",
+            [{"items": ["one", "two"]}, {"items": []}],
+        )
+
+    def test_block_tag_inside_block(self):
+        self.assert_renders_the_same(
+            "<span>A</span>\n{% block content %}<div>d</div>{% endblock %}\n<span>B</span>",
+            [{}],
+        )
+
+    def test_block_tags_next_to_if_are_compacted(self):
+        self.assertEqual(
+            compact_whitespace("<ul>\n  {% if x %}\n  <li>a</li>\n  {% endif %}\n</ul>"),
+            "<ul>{% if x %}\n<li>a</li>\n{% endif %}</ul>",
+        )
+
+    def test_multiline_attribute_values_are_kept(self):
+        source = '<span title="First line\n  second line"\n      data-items="a\n b">A</span>'
+        self.assertEqual(compact_whitespace(source), source)
+
+    def test_greater_than_in_quoted_attribute(self):
+        self.assertEqual(
+            compact_whitespace(
+                '<div>\n  <a title="a > b" data-x=\'{{ x|default:"<" }}\'>A</a>\n  <p>B</p>\n</div>'
+            ),
+            '<div><a title="a > b" data-x=\'{{ x|default:"<" }}\'>A</a><p>B</p></div>',
+        )
+
+    def test_whitespace_next_to_inline_list_items_and_breaks_is_kept(self):
+        self.assertEqual(
+            compact_whitespace('<ul class="inline">\n  <li>A</li>\n  <li>B</li>\n</ul>'),
+            '<ul class="inline"><li>A</li>\n<li>B</li></ul>',
+        )
+        self.assertEqual(compact_whitespace("A\n  <br>\n  B"), "A\n<br>\nB")
@@ -15,6 +15,7 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 
@@ -25,3 +26,8 @@ urlpatterns = [
     path("demo/", component_demo, name="component_demo"),
     path("admin/", admin.site.urls),
 ]
+
+if settings.MEMORY_DIAGNOSTICS:
+    from core.memory import memory_view
+
+    urlpatterns.append(path("diagnostics/memory/", memory_view, name="memory_diagnostics"))